@@ -1,27 +1,65 @@
 __version__ = '3.0.0'
 
-from .form import (
-    GetView,
-    CreateView, ModelCreateView, 
-    UpdateView, ModelUpdateView, 
-    ConfirmView, ModelConfirmView, ModelDeleteView
-)
-
-from .list import (
-    ListBuilder, ListView, ModelListBuilder, ModelListView
-)
-
-from .detail import (
-    DetailBuilder, DetailView, ModelDetailBuilder, ModelDetailView
-)
-
-from .cell_renderers import (
-    EmptyCell, TextCell, NumericCell, TimeCell, ImageCell,
-    FixedTextCell, FixedImageCell
-)
-
-__all__ = [
-    #'View', 'TemplateView', 'RedirectView', 'ArchiveIndexView',
-    'ListBuilder', 'ListBuilderView', 'ModelListBuilder', 'ModelListBuilderView',
-    'DetailBuilder', 'DetailBuilderView', 'ModelDetailBuilder', 'ModelDetailBuilderView',
-]
+import importlib
+
+
+# Public names are imported on first use, so touching the package
+# (e.g. 'adminlinks' at admin autodiscovery) does not load this app's
+# views, builders and cell renderers. Django's generic views load
+# with the admin anyway, so the saving is this app's modules only.
+_lazy_names = {
+    'GetView': 'form',
+    'CreateView': 'form',
+    'ModelCreateView': 'form',
+    'UpdateView': 'form',
+    'ModelUpdateView': 'form',
+    'ConfirmView': 'form',
+    'ModelConfirmView': 'form',
+    'ModelDeleteView': 'form',
+
+    'SearchView': 'search',
+
+    'Panel': 'dashboard',
+    'DashboardView': 'dashboard',
+    'AsyncDashboardView': 'dashboard',
+
+    'ListBuilder': 'list',
+    'ListView': 'list',
+    'ModelListBuilder': 'list',
+    'ModelListView': 'list',
+    'ColumnarData': 'sources',
+    'SQLRows': 'sources',
+
+    'DetailBuilder': 'detail',
+    'DetailView': 'detail',
+    'ModelDetailBuilder': 'detail',
+    'ModelDetailView': 'detail',
+
+    'EmptyCell': 'cell_renderers',
+    'TextCell': 'cell_renderers',
+    'NumericCell': 'cell_renderers',
+    'TimeCell': 'cell_renderers',
+    'ImageCell': 'cell_renderers',
+    'FixedTextCell': 'cell_renderers',
+    'FixedImageCell': 'cell_renderers',
+    'ThumbnailCell': 'cell_renderers',
+    'FixedThumbnailCell': 'cell_renderers',
+    'URLLink': 'cell_renderers',
+}
+
+
+def __getattr__(name):
+    module_name = _lazy_names.get(name)
+    if (module_name is None):
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+    value = getattr(importlib.import_module('.' + module_name, __name__), name)
+    # cache, so __getattr__ is not called again
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *_lazy_names])
+
+
+__all__ = list(_lazy_names)
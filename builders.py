@@ -1,5 +1,5 @@
 from collections import OrderedDict
-from django.forms.widgets import MediaDefiningClass
+from django.forms.widgets import Media, MediaDefiningClass
 
 from .cell_renderers import CellRenderer
 
@@ -38,3 +38,23 @@ class DeclarativeFieldsMetaclass(MediaDefiningClass):
     def __prepare__(metacls, name, bases, **kwds):
         # Remember the order in which form fields are defined.
         return OrderedDict()
+
+
+
+# tuple of cell classes -> Media
+_cells_media = {}
+
+def cells_media(cells):
+    '''
+    Sum the media of cells.
+    Cell media is declared on the cell class, so the sum is made once
+    for each combination of cell classes, and reused.
+    '''
+    key = tuple(type(cell) for cell in cells)
+    media = _cells_media.get(key)
+    if (media is None):
+        media = Media()
+        for cell in cells:
+            media = media + cell.media
+        _cells_media[key] = media
+    return media
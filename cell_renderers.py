@@ -1,9 +1,108 @@
 import datetime
+import hashlib
+import io
+import logging
+import re
+import sys
 
 #from django.utils.html import format_html, mark_safe
 from django.utils.html import conditional_escape
 from django.forms.widgets import MediaDefiningClass
 from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import NoReverseMatch, reverse
+from django.utils.http import RFC3986_SUBDELIMS
+from urllib.parse import quote
+
+
+logger = logging.getLogger(__name__)
+
+
+
+class URLLink():
+    '''
+    A cell 'link' from a URL pattern, ::
+
+        link=URLLink('firework:detail', pk='pk')
+
+    Keywords are URL arguments, the values are names of attributes (or
+    dict keys) on the row data, '__' following relations. Positional
+    arguments are names too.
+
+    The URL is reversed once, with placeholder arguments, and split into
+    a template. Rows substitute their quoted values. If the pattern
+    will not take the placeholders (e.g. a uuid converter), every row
+    is reversed. The template keeps the script prefix of the first use.
+
+    Substituted values are not checked against the converters, nor
+    passed through their to_url(). A value a converter would reject
+    makes a broken link, not a NoReverseMatch.
+    '''
+    # digits pass most converters
+    placeholder = '7491836250{0:03d}'
+
+    def __init__(self, viewname, *args, **kwargs):
+        self.viewname = viewname
+        self.args = args
+        self.kwargs = kwargs
+        self._parts = None
+
+    def _data_value(self, data, name):
+        value = data
+        for attr in name.split('__'):
+            if (isinstance(value, dict)):
+                value = value[attr]
+            else:
+                value = getattr(value, attr)
+        return value
+
+    def _compile(self):
+        names = list(self.args) + list(self.kwargs.values())
+        holders = [self.placeholder.format(i) for i in range(len(names))]
+        try:
+            url = reverse(
+                self.viewname,
+                args=holders[:len(self.args)],
+                kwargs=dict(zip(self.kwargs, holders[len(self.args):]))
+                )
+        except NoReverseMatch:
+            return ()
+        # alternate text and data names, in order in the URL
+        parts = []
+        positions = sorted(
+            (url.find(h), h, name) for h, name in zip(holders, names)
+            )
+        if (any(p < 0 for p, h, name in positions)):
+            return ()
+        start = 0
+        for p, h, name in positions:
+            parts.append(url[start:p])
+            parts.append(name)
+            start = p + len(h)
+        parts.append(url[start:])
+        return parts
+
+    def __call__(self, value, data):
+        if (self._parts is None):
+            self._parts = self._compile()
+        if (not self._parts):
+            return conditional_escape(reverse(
+                self.viewname,
+                args=[self._data_value(data, n) for n in self.args],
+                kwargs={k: self._data_value(data, n) for k, n in self.kwargs.items()}
+                ))
+        b = []
+        parts = self._parts
+        for i in range(0, len(parts) - 1, 2):
+            b.append(parts[i])
+            b.append(quote(str(self._data_value(data, parts[i + 1])), safe=RFC3986_SUBDELIMS + '/~:@'))
+        b.append(parts[-1])
+        return conditional_escape(''.join(b))
+
+    def __repr__(self):
+        return '<{0} {1!r}>'.format(self.__class__.__name__, self.viewname)
 
 
 
@@ -25,17 +124,35 @@ class CellRenderer(metaclass=MediaDefiningClass):
     
     The link can also be a callable, which takes the data
     e.g. def get_absolute_url(data):...; link=get_absolute_url
+    For URLs from patterns, use a URLLink, which reverses the pattern
+    once, not for each row.
+    
+    'aggregate' is one of 'sum', 'avg', 'min', 'max' or 'count'. If
+    set, list builders render the aggregate of the whole list in a
+    table footer.
        
     'data_field' is the name to look for in supplied objects. Some code
     automatically populates this attribute. Other code should avoid 
     populating the attribute if it is set by declaration or init param.
     Use set_data_field().
+    
+    'data_index', if set, is the position of the value in tuple rows.
+    List builders set it for rows from SQL.
+
+    'memoize', if True, keeps rendered HTML by value, so repeated values
+    (choices, related names, dates) are formatted once. List builders
+    clear the memo for each page. Up to 'memo_size' values are kept. Not
+    used if the link is callable, or formats 'data'.
     '''
     link = None
     value = None
     data_field = None
     empty_value_display = '-'
     verbose_name = None
+    aggregate = None
+    data_index = None
+    memoize = False
+    memo_size = 256
     
     def __init__(self, **kwargs):
         for key, value in kwargs.items():
@@ -49,6 +166,8 @@ class CellRenderer(metaclass=MediaDefiningClass):
             self.data_field = name
         
     def get_value(self, data):
+        if (self.data_index is not None):
+            return data[self.data_index]
         if (not self.data_field):
             return None
         elif (isinstance(data, dict)):
@@ -95,11 +214,59 @@ class CellRenderer(metaclass=MediaDefiningClass):
             o = '<a href="{0}">{1}</a>'.format(url, o)
         return o
 
-    def render(self, data):
-        v = self.get_value(data)
+    def _can_memoize(self):
+        # the output must depend on the value only
+        return (self.memoize
+            and not callable(self.link)
+            and '{data' not in (self.link or '')
+            )
+
+    def clear_memo(self):
+        self._memo = {}
+
+    def _render_value(self, v, data):
         v = self.validate_value(v)
         v = self.format_value(v)
         return self.as_html(v, data)
+
+    def _link_uses_data(self):
+        return (callable(self.link) or '{data' in (self.link or ''))
+
+    def render_column(self, values, get_row):
+        '''
+        Render a page column of values, for columnar data.
+        @param values the values, e.g. a list or NumPy array
+        @param get_row callable, index -> row data. Used only if the
+        link needs data, or the cell renders from the row.
+        @return list of HTML
+        '''
+        if (type(self).render is not CellRenderer.render):
+            # renders from the row, not a value
+            return [self.render(get_row(i)) for i in range(len(values))]
+        if (self.link and self._link_uses_data()):
+            return [self._render_value(v, get_row(i)) for i, v in enumerate(values)]
+        return [self._render_value(v, None) for v in values]
+
+    def render(self, data):
+        v = self.get_value(data)
+        if (not self._can_memoize()):
+            return self._render_value(v, data)
+        memo = self.__dict__.get('_memo')
+        if (memo is None):
+            memo = self._memo = {}
+        # type in the key, as True == 1
+        key = (type(v), v)
+        try:
+            return memo[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable
+            return self._render_value(v, data)
+        o = self._render_value(v, data)
+        if (len(memo) < self.memo_size):
+            memo[key] = o
+        return o
          
     def __str__(self):
         return  "<{0}>".format(self.__class__.__name__)
@@ -134,6 +301,12 @@ class TextCell(CellRenderer):
         
         
 class NumericCell(CellRenderer):
+    '''
+    Columns of NumPy numbers, with no 'link', are formatted as whole
+    arrays. Then 'format_str' must be '{}', or a printf-like
+    '{:<spec>}' e.g. '{:.2f}' or '{:08.3e}'. Others, such as those with
+    alignment or grouping, are formatted value by value.
+    '''
     format_str = '{}'
     
     def format_value(self, value):
@@ -142,6 +315,41 @@ class NumericCell(CellRenderer):
         """
         value = super().format_value(value)
         return self.format_str.format(value)
+
+    # Format specs which mean the same in printf. No '-', which
+    # left-aligns in printf, but is the default sign in Python
+    printf_spec_re = re.compile(r'^\{:([+ #0]*\d*(\.\d+)?[dfeEgG%])\}$')
+
+    def _format_array(self, np, values):
+        if (self.format_str == '{}'):
+            return values.astype(str)
+        match = self.printf_spec_re.match(self.format_str)
+        if (match is None):
+            return None
+        spec = match.group(1)
+        if (spec[-1] == 'd' and values.dtype.kind == 'f'):
+            # Python refuses, printf would truncate
+            return None
+        if (spec[-1] == '%'):
+            return np.char.add(np.char.mod('%' + spec[:-1] + 'f', values * 100), '%')
+        return np.char.mod('%' + spec, values)
+
+    def render_column(self, values, get_row):
+        # NumPy is used only if the data is already arrays
+        np = sys.modules.get('numpy')
+        if (np is None
+            or not isinstance(values, np.ndarray)
+            or values.dtype.kind not in 'iuf'
+            or self.link
+            or type(self).value_as_html is not CellRenderer.value_as_html
+            or type(self).format_value is not NumericCell.format_value):
+            return super().render_column(values, get_row)
+        formatted = self._format_array(np, values)
+        if (formatted is None):
+            return super().render_column(values, get_row)
+        # as format_value(), zero is 'empty'
+        empty = conditional_escape(self.empty_value_display)
+        return np.where(values == 0, empty, formatted).tolist()
         
         
         
@@ -201,6 +409,127 @@ class FixedImageCell(ImageCell):
 
     def render(self, data):
         return self.as_html(self.fixed_value, data)
+
+
+
+class ThumbnailCell(ImageCell):
+    '''
+    Render an image as a fixed-size thumbnail.
+    
+    Thumbnails are made on first use (needs Pillow), and written to
+    'storage' (default the default storage) under 'thumbnail_dir'. They
+    are named by a hash of the image contents, so are shared between
+    identical images. The location and size is kept in the Django cache.
+    If an image is replaced under the same name, clear the cache.
+    
+    The value can be a model FieldFile, or a name in 'storage'.
+    'link' is formatted with the URL of the full image. A missing or
+    unreadable image renders as 'empty_value_display', and is logged.
+    '''
+    size = (64, 64)
+    thumbnail_dir = 'quickviews/thumbnails'
+    storage = None
+    cache_alias = 'default'
+    formats = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'gif', 'WEBP': 'webp'}
+
+    def get_storage(self):
+        if (self.storage is None):
+            return default_storage
+        return self.storage
+
+    def _make_thumbnail(self, name, storage):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise ImproperlyConfigured('ThumbnailCell needs the Pillow library.')
+        
+        with storage.open(name, 'rb') as f:
+            content = f.read()
+        digest = hashlib.sha256(content).hexdigest()[:16]
+        image = Image.open(io.BytesIO(content))
+        format = image.format if (image.format in self.formats) else 'PNG'
+        thumb_name = '{0}/{1}_{2}x{3}.{4}'.format(
+            self.thumbnail_dir, digest, self.size[0], self.size[1], self.formats[format]
+            )
+        if (storage.exists(thumb_name)):
+            with storage.open(thumb_name, 'rb') as f:
+                width, height = Image.open(f).size
+        else:
+            image.thumbnail(self.size)
+            if (format == 'JPEG' and image.mode not in ('RGB', 'L')):
+                image = image.convert('RGB')
+            b = io.BytesIO()
+            image.save(b, format=format)
+            thumb_name = storage.save(thumb_name, ContentFile(b.getvalue()))
+            width, height = image.size
+        return (thumb_name, width, height)
+
+    def get_thumbnail_key(self, name, storage):
+        # Names can hold any character, and the same name in two
+        # storages is two images
+        state = '{0}.{1}|{2}|{3}|{4}|{5}x{6}|{7}'.format(
+            storage.__class__.__module__,
+            storage.__class__.__qualname__,
+            getattr(storage, 'location', ''),
+            getattr(storage, 'base_url', ''),
+            self.thumbnail_dir,
+            self.size[0],
+            self.size[1],
+            name
+            )
+        return 'quickviews.thumbnail.' + hashlib.sha1(state.encode('utf-8')).hexdigest()
+
+    def get_thumbnail(self, value):
+        '''
+        @return (url, width, height) of the thumbnail, or None if no
+        image, or the image can not be read
+        '''
+        if (not value):
+            return None
+        name = getattr(value, 'name', value)
+        storage = getattr(value, 'storage', None) or self.get_storage()
+        key = self.get_thumbnail_key(name, storage)
+        cache = caches[self.cache_alias]
+        thumb = cache.get(key)
+        if (thumb is None):
+            try:
+                thumb = self._make_thumbnail(name, storage)
+            except OSError as e:
+                # missing, or not an image (Pillow's UnidentifiedImageError).
+                # Not cached, the file may be fixed
+                logger.warning('No thumbnail for %r: %s', name, e)
+                return None
+            cache.set(key, thumb, None)
+        thumb_name, width, height = thumb
+        return (storage.url(thumb_name), width, height)
+
+    def render(self, data):
+        v = self.get_value(data)
+        thumb = self.get_thumbnail(v)
+        if (thumb is None):
+            return conditional_escape(self.empty_value_display)
+        url, width, height = thumb
+        o = '<img src="{0}" width="{1}" height="{2}" loading="lazy" alt="">'.format(
+            conditional_escape(url), width, height
+            )
+        if (self.link):
+            image_url = v.url if hasattr(v, 'url') else self.get_storage().url(v)
+            o = '<a href="{0}">{1}</a>'.format(self.get_link(image_url, data), o)
+        return o
+
+
+
+class FixedThumbnailCell(ThumbnailCell):
+    '''
+    Thumbnail of one image, named by the 'src' attribute, for every row.
+    '''
+    def __init__(self, **kwargs):
+        if (kwargs.get('src') is None):
+            raise ImproperlyConfigured('FixedThumbnailCell must have a "src" attibute.') 
+        super().__init__(**kwargs)
+
+    def get_value(self, data):
+        return self.src
         
     
 from django.db.models import fields
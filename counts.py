@@ -0,0 +1,135 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_delete, post_delete
+
+from .modelcache import ModelCache
+
+
+
+class ModelCountCache(ModelCache):
+    '''
+    Row counts for a model, and for declared filters on the model,
+    kept in the Django cache.
+
+    Counts are maintained from post_save/post_delete signals, and
+    re-synced with a real COUNT every 'resync_interval' seconds (and
+    when missing). Bulk operations, such as QuerySet.update() and
+    bulk_create(), send no signals. They will be corrected at the next
+    re-sync.
+
+    @param filters dict of name -> Q, or dict of filter() kwargs
+    '''
+    key_prefix = 'quickviews.counts'
+    resync_interval = 60 * 60
+
+    def __init__(self, model, filters=None, resync_interval=None, cache_alias=None):
+        super().__init__(model, cache_alias)
+        self.filters = {}
+        for name, f in (filters or {}).items():
+            self.filters[name] = f if isinstance(f, Q) else Q(**f)
+        if (resync_interval is not None):
+            self.resync_interval = resync_interval
+
+    def get_options(self):
+        options = super().get_options()
+        options['resync_interval'] = self.resync_interval
+        return options
+
+    def merge(self, other, given=()):
+        '''
+        Add the filters of 'other'. A name declared twice must have
+        the same filter.
+        '''
+        super().merge(other, given)
+        for name, q in other.filters.items():
+            if (name in self.filters and self.filters[name] != q):
+                raise ImproperlyConfigured(
+                    "{0} for {1} has two filters named '{2}': {3} and {4}".format(
+                        self.__class__.__name__,
+                        self.model._meta.label,
+                        name,
+                        self.filters[name],
+                        q
+                    ))
+        if (set(other.filters) - set(self.filters)):
+            self.filters.update(other.filters)
+            # pre_delete is connected only with filters
+            self.connect()
+
+    def check_filter(self, filter_name):
+        if (filter_name is not None and filter_name not in self.filters):
+            raise ImproperlyConfigured(
+                "{0} for {1} has no filter '{2}'. Declare it in model_count_cache(filters=...)".format(
+                    self.__class__.__name__,
+                    self.model._meta.label,
+                    filter_name
+                ))
+
+    def get_queryset(self, filter_name=None):
+        qs = self.model._default_manager.all()
+        if (filter_name is not None):
+            qs = qs.filter(self.filters[filter_name])
+        return qs
+
+    def resync(self, filter_name=None):
+        key = self.get_key(filter_name)
+        n = self.get_queryset(filter_name).count()
+        self.cache.set(key, n, None)
+        self.cache.set(key + '.synced', True, self.resync_interval)
+        return n
+
+    def count(self, filter_name=None):
+        '''Return the count, from the cache if possible.'''
+        self.check_filter(filter_name)
+        key = self.get_key(filter_name)
+        n = self.cache.get(key)
+        if (n is None or self.cache.get(key + '.synced') is None):
+            n = self.resync(filter_name)
+        return n
+
+    def _adjust(self, filter_name, delta):
+        try:
+            self.cache.incr(self.get_key(filter_name), delta)
+        except ValueError:
+            # not cached, will be counted on next use
+            pass
+
+    def _matching_filters(self, instance):
+        # one query for each filter, by pk
+        qs = self.model._default_manager.filter(pk=instance.pk)
+        return [name for name, q in self.filters.items() if qs.filter(q).exists()]
+
+    def on_post_save(self, sender, instance, created, **kwargs):
+        if (created):
+            self._adjust(None, 1)
+            for name in self._matching_filters(instance):
+                self._adjust(name, 1)
+        else:
+            # an update may move the instance in or out of a filter
+            for name in self.filters:
+                self.cache.delete(self.get_key(name))
+
+    def on_pre_delete(self, sender, instance, **kwargs):
+        instance._quickviews_count_filters = self._matching_filters(instance)
+
+    def on_post_delete(self, sender, instance, **kwargs):
+        self._adjust(None, -1)
+        for name in getattr(instance, '_quickviews_count_filters', ()):
+            self._adjust(name, -1)
+
+    def connect(self):
+        uid = self.get_key()
+        post_save.connect(self.on_post_save, sender=self.model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self.on_post_delete, sender=self.model, weak=False, dispatch_uid=uid)
+        if (self.filters):
+            pre_delete.connect(self.on_pre_delete, sender=self.model, weak=False, dispatch_uid=uid)
+
+
+
+def model_count_cache(model, filters=None, **kwargs):
+    '''
+    Get the count cache for a model, connected to signals.
+    Made once for each model. Filters of later calls are added, so
+    views can declare the filters they count.
+    '''
+    return ModelCountCache.for_model(model, filters, **kwargs)
@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import time
+
+from concurrent.futures import TimeoutError
+from django.conf import settings
+from django.forms.widgets import MediaDefiningClass
+from django.utils.html import conditional_escape, mark_safe
+from django.views.generic import TemplateView
+
+from .list import ListBase
+from .page import DirectPageMixin
+from .timing import ServerTimingMixin
+from .querybudget import QueryBudgetMixin
+from .media import MediaBundleMixin
+from .workers import call_in_worker, LazyExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+
+class Panel():
+    '''
+    One builder on a dashboard.
+
+    @param builder a callable returning a ListBuilder or DetailBuilder,
+    e.g. a builder class. Called for every render, in a worker, so
+    builder construction and queries run concurrently.
+    @param timeout seconds to wait for the render. After that the
+    panel is replaced by 'placeholder'.
+    @param page the page rendered, for a list builder
+    '''
+    title = None
+    timeout = 2.0
+    page = 1
+    placeholder = '<p class="placeholder">Not available just now.</p>'
+
+    def __init__(self, builder, title=None, timeout=None, page=None, placeholder=None):
+        self.builder = builder
+        if (title is not None):
+            self.title = title
+        if (timeout is not None):
+            self.timeout = timeout
+        if (page is not None):
+            self.page = page
+        if (placeholder is not None):
+            self.placeholder = placeholder
+
+    def render(self):
+        '''
+        @return (html, media)
+        '''
+        builder = self.builder()
+        if (isinstance(builder, ListBase)):
+            html = builder.as_finished_table(self.page)
+        else:
+            html = builder.as_list()
+        return (html, builder.media)
+
+    def as_html(self, html, css_class='panel'):
+        b = ['<section class="{0}">'.format(css_class)]
+        if (self.title):
+            b.append('<h2>{0}</h2>'.format(conditional_escape(self.title)))
+        b.append(html)
+        b.append('</section>')
+        return ''.join(b)
+
+    def placeholder_as_html(self):
+        return self.as_html(self.placeholder, 'panel unavailable')
+
+
+
+_executor = LazyExecutor(
+    'dashboard',
+    lambda: getattr(settings, 'QUICKVIEWS_DASHBOARD_WORKERS', 4)
+    )
+
+def get_dashboard_executor():
+    '''
+    The shared thread pool for panel renders. Size is the setting
+    QUICKVIEWS_DASHBOARD_WORKERS (default 4).
+    '''
+    return _executor.get()
+
+
+
+class DashboardBase(metaclass=MediaDefiningClass):
+    '''
+    Compose several builders on one page.
+
+    'panels' is a list of Panel. Override get_panels() to make panels
+    from the request.
+    '''
+    panels = []
+    display_title = None
+
+    def get_panels(self):
+        return self.panels
+
+    def render_panels(self, panels):
+        '''
+        Render panels on the shared thread pool, each waited on until
+        it's timeout.
+        @return list of (html, media), or None for a panel which
+        was too slow, or failed
+        '''
+        start = time.monotonic()
+        executor = get_dashboard_executor()
+        futures = [executor.submit(call_in_worker, panel.render) for panel in panels]
+        r = []
+        for panel, future in zip(panels, futures):
+            remaining = panel.timeout - (time.monotonic() - start)
+            try:
+                r.append(future.result(timeout=max(remaining, 0)))
+            except TimeoutError:
+                # a queued render need not start
+                future.cancel()
+                r.append(None)
+            except Exception:
+                # one panel does not take down the page
+                logger.exception('Dashboard panel %r failed', panel.title)
+                r.append(None)
+        return r
+
+    async def arender_panels(self, panels):
+        '''
+        Render panels as tasks, each waited on until it's timeout.
+        @return as render_panels()
+        '''
+        from asgiref.sync import sync_to_async
+
+        async def render(panel):
+            try:
+                return await asyncio.wait_for(
+                    sync_to_async(call_in_worker, thread_sensitive=False)(panel.render),
+                    timeout=panel.timeout
+                    )
+            except asyncio.TimeoutError:
+                return None
+            except Exception:
+                logger.exception('Dashboard panel %r failed', panel.title)
+                return None
+        return await asyncio.gather(*[render(panel) for panel in panels])
+
+    def get_dashboard_context(self, panels, results):
+        b = []
+        media = self.media
+        for panel, result in zip(panels, results):
+            if (result is None):
+                b.append(panel.placeholder_as_html())
+            else:
+                html, panel_media = result
+                b.append(panel.as_html(html))
+                media = media + panel_media
+        context = {
+            'content': mark_safe('<div class="dashboard">{0}</div>'.format(''.join(b))),
+            'media': media,
+            }
+        if (self.display_title):
+            context['title'] = self.display_title
+        return context
+
+    class Media:
+        css = {
+            'all': ('quickviews/css/base.css', 'quickviews/css/table.css', 'quickviews/css/list.css',)
+            }
+
+
+
+class DashboardView(QueryBudgetMixin, ServerTimingMixin, MediaBundleMixin, DirectPageMixin, DashboardBase, TemplateView):
+    '''
+    Panels render on a bounded thread pool. For WSGI.
+    Queries in the pool are not counted by the query budget.
+    '''
+    template_name = 'quickviews/generic_page.html'
+
+    def get_context_data(self, **kwargs):
+        panels = self.get_panels()
+        with self.timed('panels'):
+            results = self.render_panels(panels)
+        kwargs.update(self.get_dashboard_context(panels, results))
+        return super().get_context_data(**kwargs)
+
+
+
+class AsyncDashboardView(DirectPageMixin, DashboardBase, TemplateView):
+    '''
+    Panels render as gathered tasks. For ASGI (Django 4.1+ async
+    class-based views).
+    '''
+    template_name = 'quickviews/generic_page.html'
+
+    async def get(self, request, *args, **kwargs):
+        panels = self.get_panels()
+        results = await self.arender_panels(panels)
+        context = self.get_context_data(**kwargs)
+        context.update(self.get_dashboard_context(panels, results))
+        return self.render_to_response(context)
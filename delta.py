@@ -0,0 +1,129 @@
+import datetime
+import re
+import time
+
+from django.conf import settings
+from django.db.models.signals import post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .modelcache import ModelCache
+
+
+
+class TombstoneLog(ModelCache):
+    '''
+    A log of the pks of deleted objects, kept in the Django cache.
+
+    Each delete (post_delete signal) takes a number from an atomic
+    counter (cache.incr()), and writes (time, pk) under that number.
+    Entries expire after 'retention' seconds. Reads see at most
+    'max_entries' deletes. If a read reaches further back than the log,
+    it returns None, and the client should reload.
+
+    Bulk deletes by QuerySet.delete() send post_delete for each object,
+    so are logged. Raw SQL deletes are not.
+    '''
+    key_prefix = 'quickviews.tombstones'
+    retention = 60 * 60
+    max_entries = 1000
+
+    def __init__(self, model, retention=None, max_entries=None, cache_alias=None):
+        super().__init__(model, cache_alias)
+        if (retention is not None):
+            self.retention = retention
+        if (max_entries is not None):
+            self.max_entries = max_entries
+
+    def get_options(self):
+        options = super().get_options()
+        options.update(retention=self.retention, max_entries=self.max_entries)
+        return options
+
+    def current(self):
+        '''The number of the last delete.'''
+        return self.cache.get(self.get_key('seq')) or 0
+
+    def on_post_delete(self, sender, instance, **kwargs):
+        key = self.get_key('seq')
+        self.cache.add(key, 0, None)
+        seq = self.cache.incr(key)
+        self.cache.set(self.get_key(seq), (time.time(), instance.pk), self.retention)
+
+    def deleted_since(self, seq=None, when=None):
+        '''
+        Pks deleted after the delete numbered 'seq', or, if not
+        given, after the epoch time 'when'.
+        @return list of pks, or None if the log does not reach back
+        that far
+        '''
+        current = self.current()
+        if (seq is None):
+            if (when < time.time() - self.retention):
+                return None
+            start = max(current - self.max_entries, 0)
+        else:
+            start = seq
+            if (start > current or current - start > self.max_entries):
+                return None
+        keys = [self.get_key(i) for i in range(start + 1, current + 1)]
+        found = self.cache.get_many(keys)
+        if (seq is not None and len(found) < len(keys)):
+            # expired, or evicted
+            return None
+        entries = [found[k] for k in keys if k in found]
+        if (seq is None):
+            if (start > 0 and (not entries or entries[0][0] > when)):
+                # deletes after 'when' may be before the first read
+                return None
+            entries = [e for e in entries if e[0] > when]
+        return [pk for t, pk in entries]
+
+    def connect(self):
+        post_delete.connect(self.on_post_delete, sender=self.model, weak=False, dispatch_uid=self.get_key('seq'))
+
+
+
+def tombstone_log(model, **kwargs):
+    '''
+    Get the tombstone log for a model, connected to signals.
+    Made once for each model. Call when the project loads (e.g. on a
+    view class attribute) so deletes in every process are logged.
+    '''
+    return TombstoneLog.for_model(model, **kwargs)
+
+
+
+_token_re = re.compile(r'^\d+(\.\d+)?:\d+$')
+
+def make_delta_token(when, seq):
+    return '{0:.6f}:{1}'.format(when, seq)
+
+
+def parse_since(value):
+    '''
+    Parse a 'since' value. This is a token, as from make_delta_token(),
+    an epoch time, or an ISO 8601 datetime.
+    @return (epoch time, delete number or None)
+    @raise ValueError if the value can not be parsed
+    '''
+    if (_token_re.match(value)):
+        when, seq = value.split(':')
+        return (float(when), int(seq))
+    try:
+        return (float(value), None)
+    except ValueError:
+        pass
+    dt = parse_datetime(value)
+    if (dt is None):
+        raise ValueError('not a delta token or time: {0!r}'.format(value))
+    if (settings.USE_TZ and timezone.is_naive(dt)):
+        dt = timezone.make_aware(dt, timezone.get_default_timezone())
+    return (dt.timestamp(), None)
+
+
+def epoch_to_datetime(when):
+    '''A datetime for comparing with model fields, aware if USE_TZ.'''
+    if (settings.USE_TZ):
+        return datetime.datetime.fromtimestamp(when, tz=datetime.timezone.utc)
+    return datetime.datetime.fromtimestamp(when)
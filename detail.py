@@ -5,15 +5,19 @@ from contextlib import suppress
 from django.core.exceptions import ImproperlyConfigured
 from django.http import Http404
 from django.utils.translation import gettext as _
-from django.forms.widgets import Media
 from django.utils.html import format_html, mark_safe
+from django.utils.functional import SimpleLazyObject
 from django.views.generic import TemplateView
 from django.views.generic.base import ContextMixin
 from django.db import models
 
 
-from .builders import DeclarativeFieldsMetaclass
+from .builders import DeclarativeFieldsMetaclass, cells_media
 from .cell_renderers import default_cell_from_model_field
+from .timing import ServerTimingMixin
+from .querybudget import QueryBudgetMixin
+from .media import MediaBundleMixin
+from .page import DirectPageMixin
 
 
 
@@ -291,10 +295,7 @@ class DetailBase(SingleObjectMixin):
     @property
     def media(self):
         """Return all media required to render the cells on this builder."""
-        media = Media()
-        for cell in self.cells.values():
-            media = media + cell.media
-        return media
+        return cells_media(self.cells.values())
 
     def __str__(self):
         return self.as_list()
@@ -312,13 +313,14 @@ class DetailBuilder(DetailBase, metaclass=DeclarativeFieldsMetaclass):
 
 
 
-class DetailView(DetailBuilder, SingleObjectContextMixin, TemplateView):
+class DetailView(QueryBudgetMixin, ServerTimingMixin, MediaBundleMixin, DirectPageMixin, DetailBuilder, SingleObjectContextMixin, TemplateView):
     template_name = 'quickviews/generic_page.html'
 
     def get_context_data(self, **kwargs):
+        # rendered when the template uses them
         kwargs.update({
-        'content' : self.as_list(),
-        'media' : self.media
+        'content' : SimpleLazyObject(self.as_list),
+        'media' : SimpleLazyObject(lambda: self.media)
         })
         return super().get_context_data(**kwargs)
         
@@ -397,14 +399,15 @@ class ModelDetailBuilder(ModelDetailBase, metaclass=DeclarativeFieldsMetaclass):
 
 
 
-class ModelDetailView(ModelDetailBuilder, SingleObjectContextMixin, TemplateView):
+class ModelDetailView(QueryBudgetMixin, ServerTimingMixin, MediaBundleMixin, DirectPageMixin, ModelDetailBuilder, SingleObjectContextMixin, TemplateView):
     template_name = 'quickviews/generic_page.html'
 
     def get_context_data(self, **kwargs):
         self.object = self.get_object()
+        # rendered when the template uses them
         kwargs.update({
-        'content' : self.as_list(),
-        'media' : self.media
+        'content' : SimpleLazyObject(self.as_list),
+        'media' : SimpleLazyObject(lambda: self.media)
         })
         return super().get_context_data(**kwargs)
         
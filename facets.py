@@ -0,0 +1,138 @@
+import hashlib
+
+from django.core.cache import caches
+from django.db.models import Count
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist
+from django.http import QueryDict
+from django.utils.html import conditional_escape, mark_safe
+
+
+
+class Facet():
+    '''
+    Counts of rows for each value of a field, over a queryset.
+
+    @param name a field name. May span relations e.g. 'maker__name'.
+    Foreign keys are labelled by the related object.
+    '''
+    verbose_name = None
+
+    def __init__(self, name, verbose_name=None):
+        self.name = name
+        if (verbose_name is not None):
+            self.verbose_name = verbose_name
+
+    def get_field(self, model):
+        if ('__' in self.name):
+            return None
+        try:
+            return model._meta.get_field(self.name)
+        except FieldDoesNotExist:
+            return None
+
+    def get_verbose_name(self, model):
+        if (self.verbose_name):
+            return self.verbose_name
+        field = self.get_field(model)
+        if (field is not None):
+            return str(field.verbose_name)
+        return self.name.replace('__', ' ')
+
+    def get_counts(self, queryset):
+        '''
+        One GROUP BY query.
+        @return list of (value, count), most common first. Null values
+        are not included.
+        '''
+        rows = (queryset.order_by()
+            .exclude(**{self.name + '__isnull': True})
+            .values(self.name)
+            .annotate(quickviews_facet_count=Count('*'))
+            .order_by('-quickviews_facet_count')
+            )
+        return [(row[self.name], row['quickviews_facet_count']) for row in rows]
+
+    def get_labels(self, model, values):
+        '''@return dict of value -> display text'''
+        field = self.get_field(model)
+        if (field is not None and field.is_relation and field.related_model):
+            objs = field.related_model._default_manager.in_bulk(values)
+            return {v: str(objs.get(v, v)) for v in values}
+        if (field is not None and field.choices):
+            choices = dict(field.flatchoices)
+            return {v: str(choices.get(v, v)) for v in values}
+        return {v: str(v) for v in values}
+
+
+
+def facet_state_key(queryset, facets, filters):
+    '''
+    Cache key for a queryset, facets and a dict of filter values.
+    The SQL of the queryset is part of the key, so lists narrowed
+    differently (e.g. per user) do not share counts.
+    '''
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        # e.g. none()
+        sql = ''
+    state = '{0}|{1}?{2}'.format(
+        sql,
+        ','.join(f.name for f in facets),
+        '&'.join('{0}={1}'.format(k, v) for k, v in sorted(filters.items()))
+        )
+    return 'quickviews.facets.{0}.{1}'.format(
+        queryset.model._meta.label_lower,
+        hashlib.sha1(state.encode('utf-8')).hexdigest()
+        )
+
+
+def get_facet_counts(facets, queryset, filters, timeout=60, cache_alias='default'):
+    '''
+    Counts and labels for facets, cached for each filter state.
+    @return list of (facet name, verbose name, [(value, label, count), ...])
+    '''
+    cache = caches[cache_alias]
+    key = facet_state_key(queryset, facets, filters)
+    r = cache.get(key) if (timeout) else None
+    if (r is None):
+        r = []
+        for facet in facets:
+            counts = facet.get_counts(queryset)
+            labels = facet.get_labels(queryset.model, [v for v, c in counts])
+            r.append((
+                facet.name,
+                facet.get_verbose_name(queryset.model),
+                [(v, labels[v], c) for v, c in counts]
+                ))
+        if (timeout):
+            cache.set(key, r, timeout)
+    return r
+
+
+def facets_as_html(facet_counts, filters, path):
+    '''
+    Render facets as lists of links. A link adds the value to the
+    current filters, or, if the value is selected, removes it.
+    '''
+    b = ['<div class="facets">']
+    for name, verbose_name, values in facet_counts:
+        b.append('<h2>{0}</h2><ul class="facet">'.format(conditional_escape(verbose_name)))
+        for value, label, count in values:
+            q = QueryDict(mutable=True)
+            q.update(filters)
+            selected = (str(filters.get(name)) == str(value))
+            if (selected):
+                del q[name]
+            else:
+                q[name] = value
+            b.append('<li{0}><a href="{1}?{2}">{3}</a> <span class="count">{4}</span></li>'.format(
+                ' class="active"' if selected else '',
+                conditional_escape(path),
+                conditional_escape(q.urlencode()),
+                conditional_escape(label),
+                count
+                ))
+        b.append('</ul>')
+    b.append('</div>')
+    return mark_safe(''.join(b))
@@ -13,10 +13,13 @@ from .detail import (
     SingleObjectContextMixin, 
     SingleModelObjectContextMixin
     )
+from .timing import ServerTimingMixin
+from .querybudget import QueryBudgetMixin
+from .media import MediaBundleMixin
 
 
 
-class GetView(generic.base.TemplateView, metaclass=MediaDefiningClass):
+class GetView(QueryBudgetMixin, ServerTimingMixin, MediaBundleMixin, generic.base.TemplateView, metaclass=MediaDefiningClass):
     '''
     A View that only accepts GET method requests.
     In Django, this can be done with a few lines of code. But this view
@@ -360,7 +363,7 @@ class ModelFormMixin(DataFormMixin, SingleModelObjectContextMixin):
 
 
 
-class ProcessFormView(generic.View):
+class ProcessFormView(QueryBudgetMixin, ServerTimingMixin, MediaBundleMixin, generic.View):
     """Render a form on GET and processes it on POST."""
     def get(self, request, *args, **kwargs):
         """Handle GET requests: instantiate a blank version of the form."""
@@ -510,7 +513,7 @@ class ModelUpdateView(ModelFormMixin, BaseUpdateView):
       
 ###################################################
 ## confirm
-class ProcessConfirmView(SuccessFailMixin, generic.View):
+class ProcessConfirmView(QueryBudgetMixin, ServerTimingMixin, SuccessFailMixin, generic.View):
     """
     Handle a confirm form.
     Render on GET and process (a yes response) on POST.
@@ -540,6 +543,7 @@ class ProcessConfirmView(SuccessFailMixin, generic.View):
         
 
 class BaseConfirmView(
+    MediaBundleMixin,
     generic.detail.SingleObjectTemplateResponseMixin, 
     SingleObjectContextMixin, 
     ProcessConfirmView, 
@@ -1,20 +1,43 @@
 import copy
+import hashlib
 import re
+import time
 
 from collections import OrderedDict
 from contextlib import suppress
-from django.http import Http404
+from django.core.cache import caches
+from django.db.models import F, QuerySet, Sum, Avg, Min, Max, Count
+from django.db.models.functions import Substr
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict
 from django.utils.translation import gettext as _
-from django.forms.widgets import Media
-from django.utils.html import format_html, mark_safe
+from django.utils.html import conditional_escape, format_html, mark_safe
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
 from django.views.generic import TemplateView
 
-from .builders import DeclarativeFieldsMetaclass
-from .cell_renderers import default_cell_from_model_field
-from .paginators import (InvalidPage, PrevNextPaginator, GroupPaginator)
+from .builders import DeclarativeFieldsMetaclass, cells_media
+from .cell_renderers import TextCell, default_cell_from_model_field
+from .paginators import (InvalidPage, PrevNextPaginator, GroupPaginator, IteratorPaginator)
+from .timing import ServerTimingMixin
+from .querybudget import QueryBudgetMixin
+from .media import MediaBundleMixin
+from .page import DirectPageMixin
+from .prefetch import PrefetchNextPageMixin
+from .facets import Facet, get_facet_counts, facets_as_html
+from .delta import make_delta_token, parse_since, epoch_to_datetime
+from .sources import ColumnarData
 
 
 
+aggregate_functions = {
+    'sum': Sum,
+    'avg': Avg,
+    'min': Min,
+    'max': Max,
+    'count': Count,
+}
+
 #? allow_empty only for renderers
 #! section, not article, HTML
 
@@ -50,6 +73,12 @@ class ListRow():
     '''
     # a list of tuple [(name, RenderField)]
     fields = []
+    # cell tags of the render methods, for columnar output
+    item_tags = {
+        'as_table': ('<td{0}>', '</td>'),
+        'as_list': ('<li{0}>', '</li>'),
+        'as_span': ('<span{0}>', '</span>'),
+    }
 
     def __init__(self, fields=None):
         if (fields):
@@ -69,6 +98,22 @@ class ListRow():
             b.append(item_end)
         return mark_safe(''.join(b))
 
+    def columns_output(self, columns, item_start, item_end):
+        '''
+        Render a page of ColumnarData, a column at a time.
+        @return list, for each cell, of (opening tag, [HTML for each row])
+        '''
+        r = []
+        for name, field in self.fields.items():
+            values = columns.columns.get(field.data_field)
+            if (values is None):
+                # no column, e.g. FixedTextCell, renders from the row
+                html = [field.render(columns.row(i)) for i in range(len(columns))]
+            else:
+                html = field.render_column(values, columns.row)
+            r.append((item_start.format(' class="{0}"'.format(name)), html))
+        return r
+
     def as_table(self, data):
         "Return this row rendered as HTML <td>s."
         return self._html_output(
@@ -109,7 +154,8 @@ class ListBase():
     Render an iterable of objects as a list.
     The iterable or object can be a queryset from a model, or any 
     iterable of objects with similar fields. It is sttributes which are
-    retrieved (dicts will not work).
+    retrieved (dicts will not work). For data in columns, use
+    sources.ColumnarData.
     
     Fields defines the mapping to the objects, keys are the fields 
     sought in objects. Values are CellRenderers.
@@ -123,6 +169,14 @@ class ListBase():
     @param list_ordering  order_by args applied to list
     @param output_title for rendering. If supplied, renderers may read
     from this field to provide page titles 
+    @param count_provider if set, paginators take the row count from
+    count_provider.count(count_filter), not the list
+    @param group_by render rows in sections with a heading. A field
+    name (may span relations, 'category__name'), or for querysets a
+    tuple (name, expression) e.g. ('month', TruncMonth('pub_date')).
+    Querysets are ordered on the key, and the section counts come from
+    one GROUP BY query. Other iterables must already be in key order,
+    and have no counts.
     '''
     list = None
     list_ordering = None
@@ -139,6 +193,12 @@ class ListBase():
     #paginator_class = PrevNextPaginator
     paginator_class = GroupPaginator
     paginator_url = '/'
+    # Opt-in source of the row count, see counts.ModelCountCache
+    count_provider = None
+    count_filter = None
+    # Split rows into sections. A field name, or (name, expression)
+    group_by = None
+    empty_group_display = '-'
     
     
     def __init__(self,
@@ -251,16 +311,135 @@ class ListBase():
         page = paginator.page(page_number)
         return '' if (getattr(page, 'render', None) is None) else page.render()
       
+    def get_group_name(self):
+        if (isinstance(self.group_by, tuple)):
+            return self.group_by[0]
+        return self.group_by
+
+    def get_group_annotation(self):
+        """
+        (name, expression) annotated on a queryset for the group key.
+        A name spanning relations is annotated, so each row carries
+        it's key, not a query for each relation.
+        @return the pair, or None if the key is a field of the model
+        """
+        if (isinstance(self.group_by, tuple)):
+            return self.group_by
+        if ('__' in self.group_by):
+            return ('quickviews_group', F(self.group_by))
+        return None
+
+    def get_group_field(self):
+        """The name of the group key on rows of a queryset."""
+        annotation = self.get_group_annotation()
+        return self.group_by if (annotation is None) else annotation[0]
+
+    def get_group_relation(self, model):
+        """
+        The foreign key (or one-to-one) field grouped on, or None.
+        """
+        if (not isinstance(self.group_by, str) or '__' in self.group_by):
+            return None
+        try:
+            field = model._meta.get_field(self.group_by)
+        except FieldDoesNotExist:
+            # e.g. an annotation
+            return None
+        if (field.concrete and (field.many_to_one or field.one_to_one)):
+            return field
+        return None
+
+    def group_list(self, list):
+        """
+        Order a queryset on the group key (annotated, if an
+        expression or a relation), keeping the existing ordering
+        within groups. A foreign key is selected with the rows, for
+        the headings.
+        """
+        if (not self.group_by or not isinstance(list, QuerySet)):
+            return list
+        annotation = self.get_group_annotation()
+        if (annotation is not None):
+            list = list.annotate(**{annotation[0]: annotation[1]})
+        ordering = list.query.order_by or list.model._meta.ordering
+        field = self.get_group_relation(list.model)
+        if (field is None):
+            return list.order_by(self.get_group_field(), *ordering)
+        try:
+            list = list.select_related(field.name)
+        except TypeError:
+            # values() rows hold the key only
+            pass
+        # the related ordering may not keep a key's rows together
+        return list.order_by(field.name, field.attname, *ordering)
+
+    def get_group_counts(self):
+        """
+        Count rows in each group, in one query.
+        @return dict of group key -> count, or None if the list is not
+        a queryset
+        """
+        if (not isinstance(self.list, QuerySet)):
+            return None
+        name = self.get_group_field()
+        rows = self.group_list(self.list).order_by().values(name).annotate(
+            quickviews_group_count=Count('*')
+            )
+        return {row[name]: row['quickviews_group_count'] for row in rows}
+
+    def get_group_key(self, item):
+        if (isinstance(self.list, QuerySet)):
+            name = self.get_group_field()
+            return item[name] if (isinstance(item, dict)) else getattr(item, name)
+        value = item
+        for attr in self.get_group_name().split('__'):
+            if (isinstance(value, dict)):
+                value = value[attr]
+            else:
+                value = getattr(value, attr)
+            if (value is None):
+                break
+        return value
+
+    def format_group_key(self, key):
+        """Return the text for a group heading."""
+        return self.empty_group_display if (key is None) else str(key)
+
+    def is_unsized_list(self, list):
+        """
+        True if the list has no len() or count(), e.g. a generator.
+        """
+        return not (isinstance(list, QuerySet)
+            or hasattr(list, '__len__')
+            or callable(getattr(list, 'count', None)))
+
     def get_paginator(self, **kwargs):
         """Return an instance of the paginator for this view."""
+        if (self.is_unsized_list(self.list)):
+            # An iterator is read once. Table and navigation share the
+            # paginator, which keeps the pages read
+            cached = self.__dict__.get('_iterator_paginator')
+            if (cached is not None and cached.object_list is self.list):
+                return cached
+            p = IteratorPaginator(
+                self.list,
+                self.rows_per_page,
+                allow_empty_first_page=self.allow_empty,
+                )
+            p.paginator_url = self.paginator_url
+            self._iterator_paginator = p
+            return p
         p = self.paginator_class(
-            self.list,
+            self.group_list(self.list),
             self.rows_per_page,
             orphans=self.paginate_orphans,
             allow_empty_first_page=self.allow_empty,
             **kwargs
             )
         p.paginator_url = self.paginator_url
+        if (self.count_provider is not None):
+            # 'count' is a cached property, so can be preset
+            p.count = self.count_provider.count(self.count_filter)
         return p
         
     def paginate_list(self, page_number):
@@ -338,18 +517,73 @@ class ListBase():
         row_end, 
         list_start,
         list_end,
-        page_number
+        page_number,
+        group_heading=None
         ):
         "Output HTML. Used by as_table(), as_ul(), as_p()."
         b = []
         b.append(list_start)
         paginator, page, list, is_paginated = self.paginate_list(page_number)
+        self._rows_output(b, list, row_rend_method, row_start, row_end, group_heading)
+        b.append(list_end)
+        return mark_safe(''.join(b))
+
+    def _rows_output(self, b, list, row_rend_method, row_start, row_end, group_heading=None):
+        "Append rows of HTML to the buffer 'b'."
+        # rows from SQL are read by position
+        column_names = getattr(list, 'column_names', None)
+        for cell in self.cells.values():
+            if (cell.memoize):
+                cell.clear_memo()
+            if (column_names is not None and cell.data_field in column_names):
+                cell.data_index = column_names.index(cell.data_field)
+            else:
+                cell.data_index = None
+        if (isinstance(list, ColumnarData)):
+            self._columns_output(b, list, row_rend_method, row_start, row_end)
+            return
+        if (not (self.group_by and group_heading)):
+            for item in list:
+                b.append(row_start.format(self.get_item_attrs(item)))
+                b.append(row_rend_method(item))
+                b.append(row_end)
+            return
+        # One pass. The list is in key order, so a heading is
+        # written where the key changes.
+        counts = self.get_group_counts()
+        last_key = object()
         for item in list:
+            key = self.get_group_key(item)
+            if (key != last_key):
+                heading_key = getattr(key, 'pk', key)
+                label = self.format_group_key(key)
+                if (counts is not None and heading_key in counts):
+                    label = '{0} ({1})'.format(label, counts[heading_key])
+                b.append(group_heading.format(
+                    columns=len(self.cells),
+                    label=conditional_escape(label)
+                    ))
+                last_key = key
             b.append(row_start.format(self.get_item_attrs(item)))
             b.append(row_rend_method(item))
             b.append(row_end)
-        b.append(list_end)
-        return mark_safe(''.join(b))
+
+    def _columns_output(self, b, columns, row_rend_method, row_start, row_end):
+        # Cells format whole columns, then rows are assembled.
+        # Grouping is not applied.
+        item_start, item_end = self.row_renderer.item_tags[row_rend_method.__name__]
+        cells = self.row_renderer.columns_output(columns, item_start, item_end)
+        item_attrs = None
+        if (type(self).get_item_attrs is ListBase.get_item_attrs):
+            # does not read the row
+            item_attrs = self.get_item_attrs(None)
+        for i in range(len(columns)):
+            b.append(row_start.format(item_attrs if (item_attrs is not None) else self.get_item_attrs(columns.row(i))))
+            for start, values in cells:
+                b.append(start)
+                b.append(values[i])
+                b.append(item_end)
+            b.append(row_end)
 
     def as_table(self, page_number=1):
         "Return this list rendered as HTML table."
@@ -359,7 +593,8 @@ class ListBase():
             row_end='</tr>\n',
             list_start='<tbody>',
             list_end='</tbody>',
-            page_number=page_number
+            page_number=page_number,
+            group_heading='<tr class="group-heading"><th colspan="{columns}">{label}</th></tr>\n'
             )
 
     def as_ul(self, page_number=1):
@@ -370,7 +605,8 @@ class ListBase():
             row_end='</li>\n',
             list_start='<ul>',
             list_end='</ul>',
-            page_number=page_number
+            page_number=page_number,
+            group_heading='<li class="group-heading">{label}</li>\n'
             )
 
     def as_p(self, page_number=1):
@@ -381,24 +617,99 @@ class ListBase():
             row_end='</p>\n',
             list_start='<div>',
             list_end='</div>',
-            page_number=page_number
+            page_number=page_number,
+            group_heading='<p class="group-heading">{label}</p>\n'
             )
 
+    def as_table_fragment(self, page_number=1):
+        """
+        Return a page of this list as a HTML <tbody>, with no header.
+        For appending pages to a rendered table.
+        @return (html, next page number or None)
+        """
+        b = ['<tbody>']
+        paginator, page, list, is_paginated = self.paginate_list(page_number)
+        self._rows_output(b, list, self.row_renderer.as_table, '<tr{0}>', '</tr>\n',
+            '<tr class="group-heading"><th colspan="{columns}">{label}</th></tr>\n'
+            )
+        b.append('</tbody>')
+        next_page = page.next_page_number() if (page.has_next()) else None
+        return (mark_safe(''.join(b)), next_page)
+
+    def _aggregate_cells(self):
+        return [(name, cell) for name, cell in self.cells.items() if cell.aggregate]
+
+    def get_aggregates(self):
+        """
+        Aggregate the cells which declare an 'aggregate', over the
+        whole list (not the page).
+        A queryset is aggregated by the database, in one query.
+        @return dict of cell name -> value
+        """
+        cells = self._aggregate_cells()
+        if (not cells):
+            return {}
+        if (self.is_unsized_list(self.list)):
+            raise ImproperlyConfigured(
+                "%(cls)s can not aggregate a list with no length, as it would read the whole list" % {
+                    'cls': self.__class__.__name__
+                })
+        if (isinstance(self.list, QuerySet)):
+            return self.list.order_by().aggregate(**{
+                name: aggregate_functions[cell.aggregate](cell.data_field)
+                for name, cell in cells
+            })
+        # other iterables are already in memory
+        r = {}
+        for name, cell in cells:
+            values = [v for v in (cell.get_value(item) for item in self.list) if v is not None]
+            if (cell.aggregate == 'count'):
+                r[name] = len(values)
+            elif (not values):
+                r[name] = None
+            elif (cell.aggregate == 'sum'):
+                r[name] = sum(values)
+            elif (cell.aggregate == 'avg'):
+                r[name] = sum(values) / len(values)
+            elif (cell.aggregate == 'min'):
+                r[name] = min(values)
+            elif (cell.aggregate == 'max'):
+                r[name] = max(values)
+        return r
+
+    def footers_as_table(self):
+        "Return the cell aggregates rendered as HTML <tfoot>, or ''."
+        aggregates = self.get_aggregates()
+        if (not aggregates):
+            return ''
+        b = []
+        b.append('<tfoot><tr>')
+        for name, cell in self.cells.items():
+            b.append('<td class="{0}">'.format(name))
+            if (name in aggregates):
+                value = aggregates[name]
+                if (cell.aggregate == 'count' or value is None):
+                    value = value if value is not None else cell.empty_value_display
+                else:
+                    value = cell.format_value(value)
+                b.append(conditional_escape(value))
+            b.append('</td>')
+        b.append('</tr></tfoot>\n')
+        return mark_safe(''.join(b))
+
     def as_finished_table(self, page_number=1):
         b = []
         b.append('<table class="detail-list">')
         b.append(self.headers_as_table())
         b.append(self.as_table(page_number=page_number))
+        b.append(self.footers_as_table())
         b.append('</table>')
         return mark_safe(''.join(b))
         
     @property
     def media(self):
         """Return all media required to render the cells on this builder."""
-        media = Media()
-        for cell in self.cells.values():
-            media = media + cell.media
-        return media
+        return cells_media(self.cells.values())
 
     def __str__(self):
         return self.as_finished_table()
@@ -416,15 +727,16 @@ class ListBuilder(ListBase, metaclass=DeclarativeFieldsMetaclass):
 
 
 
-class ListView(ListBuilder, TemplateView):
+class ListView(QueryBudgetMixin, ServerTimingMixin, MediaBundleMixin, DirectPageMixin, ListBuilder, TemplateView):
     template_name = 'quickviews/generic_page.html'
 
     def get_context_data(self, **kwargs):
         #? add pagenumber from kwargs
         page_number = 1
+        # rendered when the template uses them
         kwargs.update({
-        'content' : self.as_finished_table(page_number),
-        'media' : self.media
+        'content' : SimpleLazyObject(lambda: self.as_finished_table(page_number)),
+        'media' : SimpleLazyObject(lambda: self.media)
         })
         display_name = self.get_display_name(self.object)
         if (display_name):
@@ -453,6 +765,9 @@ class ModelListBase(ListBase):
     '''
     model = None
     url_filter_arg = {}
+    # Truncate TextCell(max_length=...) columns in the database
+    truncate_in_database = True
+    truncate_annotation_prefix = 'quickviews_truncated_'
 
     def __init__(self,  
         model=None,
@@ -475,6 +790,60 @@ class ModelListBase(ListBase):
             allow_empty=allow_empty, rows_per_page=rows_per_page, 
             list_model_name=list_model_name, list_selection_name=list_selection_name
             )
+        self.truncated_fields = {}
+        if (self.truncate_in_database):
+            self._set_truncated_fields()
+
+    def _set_truncated_fields(self):
+        # Cells which truncate a text field can read from an annotation
+        # holding only the leading characters
+        model_field_names = {f.name for f in self.model._meta.concrete_fields}
+        for name, cell in self.cells.items():
+            if (isinstance(cell, TextCell)
+                and cell.max_length
+                and not cell.aggregate
+                and cell.data_field in model_field_names):
+                annotation = self.truncate_annotation_prefix + cell.data_field
+                self.truncated_fields[name] = (cell.data_field, cell.max_length, annotation)
+
+    def _read_truncated(self, annotated):
+        """
+        Point truncating cells at the annotations, if the list was
+        annotated by truncate_list(), or at the model fields, if not.
+        """
+        for name, (field_name, max_length, annotation) in self.truncated_fields.items():
+            self.cells[name].data_field = annotation if (annotated) else field_name
+
+    def truncate_list(self, list):
+        """
+        Annotate a queryset with truncated text columns and defer
+        the full columns, so they are not fetched.
+        """
+        if (not self.truncated_fields):
+            return list
+        annotations = {}
+        for field_name, max_length, annotation in self.truncated_fields.values():
+            # one more char, so the cell knows to add an ellipsis
+            annotations[annotation] = Substr(field_name, 1, max_length + 1)
+        used_fields = {cell.data_field for name, cell in self.cells.items()
+            if name not in self.truncated_fields}
+        deferred = [f for f, l, a in self.truncated_fields.values() if f not in used_fields]
+        list = list.annotate(**annotations)
+        if (deferred):
+            list = list.defer(*deferred)
+        self._read_truncated(True)
+        return list
+
+    def paginate_list(self, page_number):
+        paginator, page, list, is_paginated = super().paginate_list(page_number)
+        if (isinstance(list, QuerySet)):
+            # truncate the page only, the count is unaffected
+            list = self.truncate_list(list)
+            page.object_list = list
+        else:
+            # no annotations, cells read the model fields
+            self._read_truncated(False)
+        return (paginator, page, list, is_paginated)
 
     def inflect_by_use_fields(self, use_fields):
         if use_fields is None:
@@ -544,21 +913,219 @@ class ModelListBuilder(ModelListBase, metaclass=DeclarativeFieldsMetaclass):
 
 
 
-class ModelListView(ModelListBuilder, TemplateView):
+class ModelListView(QueryBudgetMixin, ServerTimingMixin, MediaBundleMixin, DirectPageMixin, PrefetchNextPageMixin, ModelListBuilder, TemplateView):
+    '''
+    A request with the query argument 'fragment', or the header
+    'X-QuickViews-Fragment', returns only the <tbody> rows of the
+    requested page. No page, header row, or media. If there is a next
+    page, it's fragment URL is in the response header 'X-Next-Page'.
+
+    If 'delta_field' is set (a datetime field updated on save), a request
+    with the query argument 'since' returns JSON of the rows changed
+    since then, and the pks deleted (if 'delta_tombstones' is set). Full
+    pages carry a token for the next request in the header
+    'X-Delta-Token'.
+    '''
     template_name = 'quickviews/generic_page.html'
     rows_per_page = 25
-        
-    def get_context_data(self, **kwargs):
+    fragment_query_arg = 'fragment'
+    fragment_header = 'X-QuickViews-Fragment'
+    # Seconds to cache rendered pages. None is no page cache.
+    page_cache_timeout = None
+    page_cache_alias = 'default'
+    # Field names (or Facets) counted in the aside, and filtered on
+    facets = None
+    facet_cache_timeout = 60
+    # Datetime field, e.g. auto_now, for changed rows. None is no delta mode.
+    delta_field = None
+    # token of the page rendered, or read from the page cache
+    page_delta_token = None
+    delta_query_arg = 'since'
+    # a TombstoneLog, for deleted rows
+    delta_tombstones = None
+    delta_max_rows = 500
+    # seconds re-sent, for saves not committed when the last delta ran
+    delta_overlap = 1.0
+
+    def get_facets(self):
+        return [f if isinstance(f, Facet) else Facet(f) for f in (self.facets or ())]
+
+    def get_filters(self):
+        """Return facet filter values from the query string."""
+        names = {f.name for f in self.get_facets()}
+        return {k: v for k, v in self.request.GET.items() if (k in names and v != '')}
+
+    def prepare_list(self):
+        filters = self.get_filters()
+        q = QueryDict(mutable=True)
+        q.update(filters)
         # 'page' implemented as a query parameter
-        self.paginator_url=self.request.path + '?page={}'        
+        query = q.urlencode() + '&' if (filters) else ''
+        self.paginator_url=self.request.path + '?' + query + 'page={}'        
         self.list = self.model.objects.all()
-        page_number = self.request.GET.get('page', '1')
+        if (filters):
+            try:
+                self.list = self.list.filter(**filters)
+            except (ValueError, ValidationError):
+                raise Http404(_('Invalid filter for %(verbose_name)s') % {
+                    'verbose_name': self.model._meta.verbose_name
+                })
+
+    def get_facets_as_html(self):
+        filters = self.get_filters()
+        counts = get_facet_counts(
+            self.get_facets(),
+            self.list,
+            filters,
+            timeout=self.facet_cache_timeout
+            )
+        return facets_as_html(counts, filters, self.request.path)
+
+    def get_page_number(self):
+        return self.request.GET.get('page', '1')
+
+    def is_fragment_request(self):
+        header_key = 'HTTP_' + self.fragment_header.upper().replace('-', '_')
+        return ((self.fragment_query_arg in self.request.GET)
+            or (header_key in self.request.META))
+
+    def render_fragment(self):
+        self.prepare_list()
+        with self.timed('rows'):
+            html, next_page = self.as_table_fragment(self.get_page_number())
+        response = HttpResponse(html)
+        if (next_page is not None):
+            # the next page is also a fragment
+            response['X-Next-Page'] = '{0}&{1}'.format(
+                self.paginator_url.format(next_page),
+                self.fragment_query_arg
+                )
+        return response
+
+    def is_delta_request(self):
+        return (self.delta_field is not None
+            and self.delta_query_arg in self.request.GET)
+
+    def get_delta_token(self):
+        seq = self.delta_tombstones.current() if (self.delta_tombstones is not None) else 0
+        return make_delta_token(time.time(), seq)
+
+    def render_delta(self):
+        '''
+        @return JSON with keys 'token' (for the next request), 'rows'
+        (<tr> HTML of changed rows), 'deleted' (list of pks) and
+        'reset'. If 'reset' is true, the changes could not be
+        found, and the client should reload the list.
+        '''
+        try:
+            when, seq = parse_since(self.request.GET[self.delta_query_arg])
+        except ValueError:
+            raise Http404(_('Invalid %(name)s value') % {'name': self.delta_query_arg})
+        # token first, so changes during the render are sent next time
+        token = self.get_delta_token()
+        self.prepare_list()
+        deleted = []
+        if (self.delta_tombstones is not None):
+            deleted = self.delta_tombstones.deleted_since(seq, when)
+        r = {'token': token, 'rows': '', 'deleted': [], 'reset': False}
+        if (deleted is None):
+            r['reset'] = True
+            return JsonResponse(r)
+        changed = self.list.filter(**{
+            self.delta_field + '__gt': epoch_to_datetime(when - self.delta_overlap)
+            })
+        if (isinstance(changed, QuerySet)):
+            changed = self.truncate_list(changed)
+        rows = list(changed[:self.delta_max_rows + 1])
+        if (len(rows) > self.delta_max_rows):
+            r['reset'] = True
+            return JsonResponse(r)
+        b = []
+        with self.timed('rows'):
+            self._rows_output(b, rows, self.row_renderer.as_table, '<tr{0}>', '</tr>\n')
+        r['rows'] = ''.join(b)
+        r['deleted'] = deleted
+        return JsonResponse(r)
+
+    def get_page_cache_key(self, page_number):
+        filters = '&'.join('{0}={1}'.format(k, v) for k, v in sorted(self.get_filters().items()))
+        return 'quickviews.page.{0}.{1}.{2}.{3}.{4}'.format(
+            self.__class__.__module__,
+            self.__class__.__qualname__,
+            self.request.path,
+            hashlib.sha1(filters.encode('utf-8')).hexdigest(),
+            page_number
+            )
+
+    def render_page(self, page_number):
+        """
+        Render a page of the list.
+        @return (content, pagination_nav, delta token or None)
+        """
+        # token first, so changes during the render are sent next time
+        token = self.get_delta_token() if (self.delta_field is not None) else None
+        return (
+            self.as_finished_table(page_number),
+            self.get_pagination_as_html(page_number),
+            token
+            )
+
+    def get_page_html(self, page_number):
+        """
+        Render a page of the list, through the page cache if
+        'page_cache_timeout' is set. The delta token of the render is
+        kept in 'page_delta_token'.
+        @return (content, pagination_nav, delta token or None)
+        """
+        if (self.page_cache_timeout is None):
+            html = self.render_page(page_number)
+        else:
+            cache = caches[self.page_cache_alias]
+            key = self.get_page_cache_key(page_number)
+            html = cache.get(key)
+            if (html is None or len(html) != 3):
+                html = self.render_page(page_number)
+                cache.set(key, html, self.page_cache_timeout)
+        self.page_delta_token = html[2]
+        return html
+
+    def set_delta_token(self, response, token):
+        # a page from the cache is only as new as it's render
+        response['X-Delta-Token'] = self.page_delta_token or token
+
+    def get(self, request, *args, **kwargs):
+        if (self.is_delta_request()):
+            return self.render_delta()
+        token = self.get_delta_token() if (self.delta_field is not None) else None
+        if (self.is_fragment_request()):
+            response = self.render_fragment()
+        else:
+            response = super().get(request, *args, **kwargs)
+        if (token is not None):
+            if (getattr(response, 'is_rendered', True)):
+                self.set_delta_token(response, token)
+            else:
+                # the page, so it's token, is read when rendered
+                response.add_post_render_callback(
+                    lambda response: self.set_delta_token(response, token)
+                    )
+        patch_vary_headers(response, (self.fragment_header,))
+        return response
+
+    def get_context_data(self, **kwargs):
+        self.prepare_list()
+        page_number = self.get_page_number()
+        # rendered when the template uses them. Content and navigation
+        # are rendered (or fetched from the page cache) together
+        page_html = SimpleLazyObject(lambda: self.get_page_html(page_number))
 
         kwargs.update({
-        'content' : self.as_finished_table(page_number),
-        'pagination_nav' : self.get_pagination_as_html(page_number),
-        'media' : self.media
+        'content' : SimpleLazyObject(lambda: page_html[0]),
+        'pagination_nav' : SimpleLazyObject(lambda: page_html[1]),
+        'media' : SimpleLazyObject(lambda: self.media)
         })
+        if (self.facets):
+            kwargs['aside'] = SimpleLazyObject(self.get_facets_as_html)
         display_name = self.get_display_name()
         if (display_name):
             kwargs['title'] = display_name
@@ -0,0 +1,195 @@
+import hashlib
+import posixpath
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import caches
+from django.forms.widgets import Media
+from django.http import Http404, HttpResponse
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.html import format_html, html_safe, mark_safe
+
+
+
+# bundle name -> CSS text, for this process.
+# Shared between processes through the 'default' cache.
+_bundles = {}
+
+# media key -> MediaBundle
+_media_bundles = {}
+
+BUNDLE_CACHE_PREFIX = 'quickviews.media.bundle.'
+BUNDLE_MAX_AGE = 60 * 60 * 24 * 365
+
+_css_url = re.compile(r'''url\((['"]?)(?!data:|[a-z]+://|/|#)([^'")]+)\1\)''')
+
+
+def _rewrite_urls(css, path):
+    # relative url()s are relative to the original file, not the bundle
+    base = posixpath.dirname(path)
+    def rewrite(match):
+        target = posixpath.normpath(posixpath.join(base, match.group(2)))
+        return 'url("{0}")'.format(static(target))
+    return _css_url.sub(rewrite, css)
+
+
+def _is_local(path):
+    return not path.startswith(('http://', 'https://', '/'))
+
+
+def _read_static(path):
+    '''@return text of a static file, or None if it can not be found'''
+    full_path = finders.find(path)
+    if (not full_path):
+        return None
+    with open(full_path, encoding='utf-8') as f:
+        return f.read()
+
+
+def build_css_bundle(css):
+    '''
+    Concatenate local static CSS files in order. Non-'all' media are
+    wrapped in @media rules.
+
+    @param css dict of medium -> [path, ...], as Media._css
+    @return (name, text, remainder) where remainder is a dict of
+    paths which could not be bundled (remote, or not found). name and
+    text are None if nothing could be bundled.
+    '''
+    b = []
+    remainder = {}
+    for medium, paths in css.items():
+        for path in paths:
+            text = _read_static(path) if _is_local(path) else None
+            if (text is None):
+                remainder.setdefault(medium, []).append(path)
+                continue
+            text = '/* {0} */\n{1}\n'.format(path, _rewrite_urls(text, path))
+            if (medium != 'all'):
+                text = '@media {0} {{\n{1}}}\n'.format(medium, text)
+            b.append(text)
+    if (not b):
+        return (None, None, remainder)
+    text = ''.join(b)
+    name = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+    return (name, text, remainder)
+
+
+def register_bundle(name, text):
+    if (name not in _bundles):
+        _bundles[name] = text
+        caches['default'].set(BUNDLE_CACHE_PREFIX + name, text, None)
+
+
+def get_bundle(name):
+    text = _bundles.get(name)
+    if (text is None):
+        text = caches['default'].get(BUNDLE_CACHE_PREFIX + name)
+        if (text is not None):
+            _bundles[name] = text
+    return text
+
+
+
+@html_safe
+class MediaBundle():
+    '''
+    Media with the local CSS merged into one hashed file, or inlined
+    into a <style> element.
+    Javascript, and CSS which could not be bundled, render as
+    ordinary Media.
+    '''
+    def __init__(self, name, text, inline, media):
+        self.name = name
+        self.text = text
+        self.inline = inline
+        # unbundled remainder
+        self.media = media
+        self._html = None
+
+    def render_css(self):
+        if (self.name is None):
+            return ''
+        if (self.inline):
+            return format_html('<style>{0}</style>', mark_safe(self.text))
+        return format_html(
+            '<link href="{0}" type="text/css" media="all" rel="stylesheet">',
+            reverse('quickviews:css_bundle', args=[self.name])
+        )
+
+    def render(self):
+        if (self._html is None):
+            b = [self.render_css()]
+            remainder = self.media.render()
+            if (remainder):
+                b.append(remainder)
+            self._html = mark_safe('\n'.join(b))
+        return self._html
+
+    def __str__(self):
+        return self.render()
+
+
+def get_media_bundle(media, inline=False):
+    '''
+    Bundle a Media. Bundles are built once for each combination of
+    files, and reused.
+    '''
+    key = (
+        tuple((medium, tuple(paths)) for medium, paths in media._css.items()),
+        tuple(media._js),
+        inline
+    )
+    bundle = _media_bundles.get(key)
+    if (bundle is None):
+        name, text, remainder = build_css_bundle(media._css)
+        if (name and not inline):
+            register_bundle(name, text)
+        bundle = MediaBundle(name, text, inline, Media(css=remainder, js=media._js))
+        _media_bundles[key] = bundle
+    return bundle
+
+
+def css_bundle(request, name):
+    '''Serve a CSS bundle, with long-lived cache headers.'''
+    text = get_bundle(name)
+    if (text is None):
+        raise Http404('No CSS bundle {0}'.format(name))
+    response = HttpResponse(text, content_type='text/css; charset=utf-8')
+    response['Cache-Control'] = 'public, max-age={0}, immutable'.format(BUNDLE_MAX_AGE)
+    return response
+
+
+
+class MediaBundleMixin():
+    '''
+    Replace the context 'media' with a bundle.
+
+    'bundle_media' merges local CSS into one hashed file, served
+    by the 'quickviews.urls' URLs. 'inline_media' puts the CSS in a
+    <style> element in the page head instead (no URLs needed). If not
+    set, the attributes are taken from the settings
+    QUICKVIEWS_BUNDLE_MEDIA and QUICKVIEWS_INLINE_MEDIA, default False.
+    '''
+    bundle_media = None
+    inline_media = None
+
+    def get_bundle_media(self):
+        if (self.bundle_media is None):
+            return getattr(settings, 'QUICKVIEWS_BUNDLE_MEDIA', False)
+        return self.bundle_media
+
+    def get_inline_media(self):
+        if (self.inline_media is None):
+            return getattr(settings, 'QUICKVIEWS_INLINE_MEDIA', False)
+        return self.inline_media
+
+    def render_to_response(self, context, **response_kwargs):
+        media = context.get('media')
+        if (isinstance(media, Media)):
+            inline = self.get_inline_media()
+            if (inline or self.get_bundle_media()):
+                context['media'] = get_media_bundle(media, inline)
+        return super().render_to_response(context, **response_kwargs)
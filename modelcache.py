@@ -0,0 +1,82 @@
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+
+
+
+class ModelCache():
+    '''
+    State about a model kept in the Django cache, and maintained from
+    model signals. Subclasses set 'key_prefix', and connect their
+    handlers in connect().
+
+    Use for_model(), which makes one instance for each model, connected.
+    '''
+    cache_alias = 'default'
+    key_prefix = 'quickviews'
+
+    def __init__(self, model, cache_alias=None):
+        self.model = model
+        if (cache_alias is not None):
+            self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_key(self, name=None):
+        return '{0}.{1}.{2}'.format(
+            self.key_prefix,
+            self.model._meta.label_lower,
+            '' if (name is None) else name
+            )
+
+    def connect(self):
+        raise NotImplementedError('subclasses of ModelCache must provide a connect() method')
+
+    def get_options(self):
+        '''Settings which must agree for all users of the instance.'''
+        return {'cache_alias': self.cache_alias}
+
+    def merge(self, other, given=()):
+        '''
+        Take the configuration of 'other', made from the arguments of
+        a later for_model() call.
+        @param given names of the keyword arguments of that call
+        @raise ImproperlyConfigured if a given option disagrees
+        '''
+        options = self.get_options()
+        other_options = other.get_options()
+        for name in given:
+            if (name in options and options[name] != other_options[name]):
+                raise ImproperlyConfigured(
+                    "{0} for {1} has {2}={3!r}, not {4!r}".format(
+                        self.__class__.__name__,
+                        self.model._meta.label,
+                        name,
+                        options[name],
+                        other_options[name]
+                    ))
+
+    @classmethod
+    def for_model(cls, model, *args, **kwargs):
+        '''
+        Get the instance for a model, connected to signals. Made once
+        for each model. Arguments of later calls are merged, see
+        merge().
+        '''
+        instance = _instances.get((cls, model))
+        if (instance is None):
+            instance = cls(model, *args, **kwargs)
+            instance.connect()
+            _instances[(cls, model)] = instance
+        elif (args or kwargs):
+            instance.merge(cls(model, *args, **kwargs), kwargs)
+        return instance
+
+    def __repr__(self):
+        return '<{0} model={1}>'.format(self.__class__.__name__, self.model._meta.label)
+
+
+
+# (class, model) -> ModelCache
+_instances = {}
@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.utils.html import conditional_escape, strip_tags
+from django.utils.safestring import SafeData, mark_safe
+from django.utils.text import capfirst
+
+
+
+# Page skeleton, as rendered by 'quickviews/generic_page.html'
+# extending 'quickviews/base.html'. If the templates change, these
+# must change too.
+PAGE_START = (
+    '\n    \n<!DOCTYPE html>\n<html lang="en">\n  <head>\n    \n    <title>'
+    )
+HEAD_START = (
+    '</title>\n    <meta charset="utf-8">\n'
+    '    <meta name="viewport" content="width=device-width, initial-scale=1">\n'
+    '    \n    '
+    )
+BODY_START = '\n  </head>\n\n  <body>\n    <article>\n    '
+NAVIGATORS_START = '\n          <ul class="navigatorslist">\n            '
+NAVIGATOR_ITEM = '\n              <li>{0}</li>\n            '
+NAVIGATORS_END = '\n          </ul>\n    '
+MESSAGES_START = '\n\n    \n        '
+MESSAGELIST_START = '\n          <ul class="messagelist">\n            '
+MESSAGE_ITEM = '\n              <li{0}>{1}</li>\n            '
+MESSAGELIST_END = '\n          </ul>\n        '
+HEADER_START = '\n    \n\n    <header>\n    <h1>'
+CONTENT_START = '</h1>\n    </header>\n    \n    '
+FOOTER_START = '\n\n    <footer>\n    \n    '
+PAGENAV = '\n    <ul class="pagenav">\n      {0}\n    </ul>\n    '
+ARTICLE_END = '\n\n    </footer>\n    </article>\n\n    '
+ASIDE = '    \n    <aside>\n      {0}\n    </aside>\n    '
+PAGE_END = '\n\n  </body>\n</html>\n'
+
+
+def _filtered(value, func):
+    # Template filters marked 'is_safe' keep the safety of the input
+    safe = isinstance(value, SafeData)
+    value = func(str(value))
+    return mark_safe(value) if safe else value
+
+
+def _value(context, key):
+    value = context.get(key)
+    return '' if value is None else value
+
+
+def render_generic_page(context, request=None):
+    '''
+    Assemble the page 'quickviews/generic_page.html' would render,
+    without the template engine.
+
+    'title', 'messages' and 'navigators' are escaped. Other values
+    ('content', 'media' etc.) are expected to be safe HTML from the
+    builders, and are conditionally escaped, as the template would.
+
+    Messages are read from the context or, if absent, from the request.
+    '''
+    title = _value(context, 'title')
+    b = [PAGE_START]
+    b.append(' {0} '.format(conditional_escape(_filtered(title, strip_tags))))
+    b.append(HEAD_START)
+    b.append(conditional_escape(_value(context, 'media')))
+    b.append(BODY_START)
+
+    b.append(NAVIGATORS_START)
+    for navigator in context.get('navigators') or ():
+        b.append(NAVIGATOR_ITEM.format(
+            conditional_escape(_filtered(navigator, capfirst))
+        ))
+    b.append(NAVIGATORS_END)
+
+    b.append(MESSAGES_START)
+    messages = context.get('messages')
+    if (messages is None and request is not None):
+        messages = get_messages(request)
+    if (messages):
+        b.append(MESSAGELIST_START)
+        for message in messages:
+            tags = ''
+            if (message.tags):
+                tags = ' class="{0}"'.format(conditional_escape(message.tags))
+            b.append(MESSAGE_ITEM.format(
+                tags,
+                conditional_escape(_filtered(message, capfirst))
+            ))
+        b.append(MESSAGELIST_END)
+
+    b.append(HEADER_START)
+    b.append(' {0} '.format(conditional_escape(title)))
+    b.append(CONTENT_START)
+    b.append(conditional_escape(_value(context, 'content')))
+    b.append(FOOTER_START)
+    pagination_nav = context.get('pagination_nav')
+    if (pagination_nav):
+        b.append(PAGENAV.format(conditional_escape(pagination_nav)))
+    b.append(ARTICLE_END)
+    aside = context.get('aside')
+    if (aside):
+        b.append(ASIDE.format(conditional_escape(aside)))
+    b.append(PAGE_END)
+    return mark_safe(''.join(b))
+
+
+
+class DirectPageMixin():
+    '''
+    Render the stock page without the template engine.
+
+    Only used if 'direct_page' is True and the view's 'template_name'
+    is the stock 'quickviews/generic_page.html'. If the templates are
+    overridden, leave this off, or the override will be ignored.
+    If 'direct_page' is not set, it is taken from the setting
+    QUICKVIEWS_DIRECT_PAGE, default False.
+    '''
+    direct_page = None
+    direct_page_template_name = 'quickviews/generic_page.html'
+
+    def get_direct_page(self):
+        if (self.direct_page is None):
+            return getattr(settings, 'QUICKVIEWS_DIRECT_PAGE', False)
+        return self.direct_page
+
+    def render_to_response(self, context, **response_kwargs):
+        if (self.get_direct_page()
+            and self.template_name == self.direct_page_template_name):
+            return HttpResponse(
+                render_generic_page(context, self.request),
+                content_type=response_kwargs.get('content_type'),
+                status=response_kwargs.get('status'),
+            )
+        return super().render_to_response(context, **response_kwargs)
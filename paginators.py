@@ -1,7 +1,10 @@
 import math
+from itertools import chain, islice
 from django.utils.html import format_html, mark_safe
 
-from django.core.paginator import InvalidPage, Paginator, Page
+from django.core.paginator import EmptyPage, InvalidPage, PageNotAnInteger, Paginator, Page
+from django.db import connections, DatabaseError
+from django.utils.functional import cached_property
 
 
 
@@ -33,6 +36,87 @@ class PrevNextPaginator(Paginator):
 
 
         
+class IteratorPage(PrevNextPage):
+    '''
+    A page of an iterator. There is no total, so the page knows only
+    if there is a next page.
+    '''
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        if (not self._has_next):
+            raise EmptyPage('That page contains no results')
+        return self.number + 1
+
+    def start_index(self):
+        if (not self.object_list):
+            return 0
+        return (self.paginator.per_page * (self.number - 1)) + 1
+
+    def end_index(self):
+        return self.start_index() + len(self.object_list) - 1 if (self.object_list) else 0
+
+
+
+class IteratorPaginator(Paginator):
+    '''
+    Paginate iterables with no len(), such as generators, by reading
+    only as far as the page, plus one row to find if there is a next
+    page. There is no count, or number of pages. Pages render
+    'previous' and 'next' links.
+
+    An iterable is read from the start for each page. An iterator
+    (e.g. a generator) can be read once, so it's pages can be got only
+    in order. 'orphans' is not used.
+    '''
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self._is_iterator = (iter(object_list) is object_list)
+        self._position = 0
+        self._held = []
+        self._pages = {}
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def _read(self, start, n):
+        if (not self._is_iterator):
+            return list(islice(self.object_list, start, start + n))
+        if (start < self._position):
+            raise EmptyPage('That page has been read, and the iterator can not go back')
+        source = chain(self._held, self.object_list)
+        rows = list(islice(source, start - self._position, start - self._position + n))
+        # the row after the page belongs to the next page
+        self._held = rows[self.per_page:]
+        self._position = start + min(len(rows), self.per_page)
+        return rows
+
+    def page(self, number):
+        number = self.validate_number(number)
+        page = self._pages.get(number)
+        if (page is None):
+            rows = self._read((number - 1) * self.per_page, self.per_page + 1)
+            if (not rows and (number > 1 or not self.allow_empty_first_page)):
+                raise EmptyPage('That page contains no results')
+            page = IteratorPage(rows[:self.per_page], number, self, len(rows) > self.per_page)
+            self._pages[number] = page
+        return page
+
+
+
 class GroupPage(Page):
     '''
     Pagination Page with group renderer.
@@ -86,3 +170,110 @@ class GroupPaginator(Paginator):
     def _get_page(self, *args, **kwargs):
         return GroupPage(*args, **kwargs)
         
+
+
+
+def postgresql_row_estimate(queryset):
+    '''Planner estimate of table rows, from pg_class.reltuples.'''
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE relname = %s',
+            [queryset.model._meta.db_table]
+            )
+        row = cursor.fetchone()
+    # reltuples is -1 (or 0) for tables never analyzed
+    if (row is None or row[0] <= 0):
+        return None
+    return int(row[0])
+
+
+def sqlite_row_estimate(queryset):
+    '''Table rows, from sqlite_stat1 (needs ANALYZE).'''
+    try:
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1',
+                [queryset.model._meta.db_table]
+                )
+            row = cursor.fetchone()
+    except DatabaseError:
+        # no sqlite_stat1 table
+        return None
+    if (row is None):
+        return None
+    return int(row[0].split()[0])
+
+
+row_estimators = {
+    'postgresql': postgresql_row_estimate,
+    'sqlite': sqlite_row_estimate,
+}
+
+def default_row_estimate(object_list):
+    '''
+    Estimate rows from database statistics.
+    Only unfiltered querysets can be estimated from table statistics.
+    @return a row count, or None if no estimate is available
+    '''
+    query = getattr(object_list, 'query', None)
+    if (query is None or query.where or query.low_mark or query.high_mark is not None):
+        return None
+    estimator = row_estimators.get(connections[object_list.db].vendor)
+    if (estimator is None):
+        return None
+    return estimator(object_list)
+
+
+
+class EstimatedGroupPage(GroupPage):
+    '''
+    GroupPage which says when the page count is estimated.
+    '''
+    def html_estimate(self):
+        return '<li class="estimate">about {0} pages</li>'.format(self.paginator.num_pages)
+
+    def render(self):
+        html = super().render()
+        if (self.paginator.count_is_estimate):
+            html = mark_safe(html + self.html_estimate())
+        return html
+
+
+
+class EstimatedCountPaginator(GroupPaginator):
+    '''
+    GroupPaginator which takes the row count from an estimate, for
+    very large tables where exact counts do not matter.
+
+    The estimate comes from 'row_estimator', a callable taking the
+    object list and returning a count, or None. Below
+    'exact_count_threshold' rows, or if there is no estimate, the
+    count is exact.
+
+    Out-of-range page numbers are clamped to the first or last page,
+    not raised as InvalidPage. As the count may be wrong, the last pages
+    may be empty.
+    '''
+    row_estimator = staticmethod(default_row_estimate)
+    exact_count_threshold = 10000
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        estimate = self.row_estimator(self.object_list)
+        if (estimate is None or estimate < self.exact_count_threshold):
+            return super().count
+        self.count_is_estimate = True
+        return estimate
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            return 1
+        if (number < 1):
+            return 1
+        return min(number, max(self.num_pages, 1))
+
+    def _get_page(self, *args, **kwargs):
+        return EstimatedGroupPage(*args, **kwargs)
@@ -0,0 +1,132 @@
+import os
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import Http404
+
+from .workers import call_in_worker, LazyExecutor
+
+
+
+class PagePrefetcher():
+    '''
+    Run page renders on a small, bounded thread pool.
+
+    Work is refused, not queued, when,
+    - a key (e.g. a view class) is already running 'limit' renders
+    - 'max_pending' renders are waiting or running
+    - the system load average, per CPU, is over 'max_load'
+    '''
+    def __init__(self, max_workers=2, max_pending=8, max_load=1.0):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_load = max_load
+        self.pending = 0
+        self.running = {}
+        self.lock = threading.Lock()
+        self._executor = LazyExecutor('prefetch', max_workers)
+
+    @property
+    def executor(self):
+        return self._executor.get()
+
+    def under_load(self):
+        if (self.max_load is None):
+            return False
+        try:
+            load = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            # not available on this platform
+            return False
+        return (load / (os.cpu_count() or 1)) > self.max_load
+
+    def submit(self, key, limit, func, *args):
+        '''
+        @return True if the work was accepted
+        '''
+        if (self.under_load()):
+            return False
+        with self.lock:
+            if (self.pending >= self.max_pending
+                or self.running.get(key, 0) >= limit):
+                return False
+            self.pending += 1
+            self.running[key] = self.running.get(key, 0) + 1
+        self.executor.submit(self._run, key, func, args)
+        return True
+
+    def _run(self, key, func, args):
+        try:
+            call_in_worker(func, *args)
+        finally:
+            with self.lock:
+                self.pending -= 1
+                self.running[key] -= 1
+
+
+_prefetcher = None
+
+def get_prefetcher():
+    '''
+    The shared prefetcher. Configured by the settings
+    QUICKVIEWS_PREFETCH_WORKERS, QUICKVIEWS_PREFETCH_MAX_PENDING and
+    QUICKVIEWS_PREFETCH_MAX_LOAD.
+    '''
+    global _prefetcher
+    if (_prefetcher is None):
+        _prefetcher = PagePrefetcher(
+            max_workers=getattr(settings, 'QUICKVIEWS_PREFETCH_WORKERS', 2),
+            max_pending=getattr(settings, 'QUICKVIEWS_PREFETCH_MAX_PENDING', 8),
+            max_load=getattr(settings, 'QUICKVIEWS_PREFETCH_MAX_LOAD', 1.0),
+            )
+    return _prefetcher
+
+
+
+class PrefetchNextPageMixin():
+    '''
+    After serving a list page, render the next page in the background
+    and put it in the page cache. So the usual next click, forward,
+    is a cache hit.
+
+    Needs the page cache ('page_cache_timeout'). 'prefetch_concurrency'
+    limits the background renders running for the view class.
+    '''
+    prefetch_next_page = False
+    prefetch_concurrency = 1
+
+    def _prefetch_page(self, page_number):
+        cache = caches[self.page_cache_alias]
+        key = self.get_page_cache_key(page_number)
+        if (cache.get(key) is not None):
+            return
+        try:
+            html = self.render_page(page_number)
+        except Http404:
+            # past the last page
+            return
+        cache.set(key, html, self.page_cache_timeout)
+
+    def prefetch_page(self, page_number):
+        return get_prefetcher().submit(
+            self.__class__,
+            self.prefetch_concurrency,
+            self._prefetch_page,
+            page_number
+            )
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if (self.prefetch_next_page and self.page_cache_timeout is not None):
+            # context values are lazy, and the background render
+            # shares this view. So finish this page first
+            if (callable(getattr(response, 'render', None))):
+                response.render()
+            try:
+                next_page = int(self.get_page_number()) + 1
+            except ValueError:
+                next_page = None
+            if (next_page is not None):
+                self.prefetch_page(next_page)
+        return response
@@ -0,0 +1,149 @@
+import re
+import warnings
+
+from collections import Counter
+from contextlib import contextmanager, ExitStack
+from django.conf import settings
+from django.db import connections
+
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+
+class QueryBudgetWarning(RuntimeWarning):
+    pass
+
+
+
+_string_literal = re.compile(r"'(?:[^']|'')*'")
+_number_literal = re.compile(r'\b\d+(?:\.\d+)?\b')
+_in_list = re.compile(r'IN \((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+
+def sql_pattern(sql):
+    '''
+    Reduce SQL to a pattern, so queries which differ only by their
+    parameters compare equal.
+    '''
+    sql = _string_literal.sub('?', sql)
+    sql = _number_literal.sub('?', sql)
+    sql = _in_list.sub('IN (...)', sql)
+    return sql
+
+
+
+class QueryRecorder():
+    '''
+    Database execute wrapper which records executed SQL.
+    Install with connection.execute_wrapper().
+    '''
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def duplicates(self):
+        '''
+        @return list of (pattern, count) for patterns run more than
+        once, most repeated first
+        '''
+        counts = Counter(sql_pattern(sql) for sql in self.queries)
+        return [(p, c) for p, c in counts.most_common() if c > 1]
+
+    def report(self, budget, label=None):
+        b = ['{0}executed {1} queries, budget is {2}.'.format(
+            label + ' ' if label else '',
+            self.count,
+            budget
+        )]
+        duplicates = self.duplicates()
+        if (duplicates):
+            b.append('Repeated queries:')
+            for pattern, count in duplicates:
+                b.append('  {0} x {1}'.format(count, pattern))
+        return '\n'.join(b)
+
+
+
+@contextmanager
+def record_queries():
+    '''Record queries run on all connections.'''
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield recorder
+
+
+def check_query_budget(recorder, budget, action='raise', label=None):
+    '''
+    @param action 'raise' or 'warn'
+    '''
+    if (budget is None or recorder.count <= budget):
+        return
+    msg = recorder.report(budget, label)
+    if (action == 'raise'):
+        raise QueryBudgetExceeded(msg)
+    warnings.warn(msg, QueryBudgetWarning, stacklevel=3)
+
+
+@contextmanager
+def assert_query_budget(budget, action='raise', label=None):
+    '''
+    Test helper. Fail if the enclosed code runs more than 'budget'
+    queries e.g. ::
+
+        with assert_query_budget(3):
+            self.client.get('/fireworks/')
+    '''
+    with record_queries() as recorder:
+        yield recorder
+    check_query_budget(recorder, budget, action, label)
+
+
+
+class QueryBudgetMixin():
+    '''
+    Count the queries executed by a view request, and warn or raise
+    if they exceed the attribute 'query_budget'. The report lists
+    repeated SQL, which is usually a per-row query from a callable link
+    or relation cell.
+
+    'query_budget_action' is 'warn' or 'raise'. If not set, it is
+    taken from the setting QUICKVIEWS_QUERY_BUDGET_ACTION, default
+    'warn'. Set to 'raise' in a CI test settings file.
+
+    The template is rendered inside the view, so queries from lazy
+    context values are counted.
+    '''
+    query_budget = None
+    query_budget_action = None
+
+    def get_query_budget_action(self):
+        if (self.query_budget_action is None):
+            return getattr(settings, 'QUICKVIEWS_QUERY_BUDGET_ACTION', 'warn')
+        return self.query_budget_action
+
+    def dispatch(self, request, *args, **kwargs):
+        if (self.query_budget is None):
+            return super().dispatch(request, *args, **kwargs)
+        with record_queries() as recorder:
+            response = super().dispatch(request, *args, **kwargs)
+            if (callable(getattr(response, 'render', None))
+                and not getattr(response, 'is_rendered', True)):
+                response.render()
+        check_query_budget(
+            recorder,
+            self.query_budget,
+            self.get_query_budget_action(),
+            '{0} ({1})'.format(self.__class__.__name__, request.path)
+        )
+        return response
@@ -0,0 +1,445 @@
+import threading
+import time
+
+from collections import OrderedDict
+from django import forms
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.models import Case, When
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_save, post_delete
+from django.utils.html import mark_safe
+
+from .form import GetView
+from .inline_templates import submit_action
+from .list import ModelListBuilder
+
+
+
+class SearchBackend():
+    '''
+    Full-text search over some fields of a model.
+    search() returns the queryset filtered to matches, and ordered by
+    rank, best first. The rank is annotated as 'search_rank'.
+    '''
+    def __init__(self, fields):
+        self.fields = fields
+
+    def search(self, queryset, query):
+        raise NotImplementedError('subclasses of SearchBackend must provide a search() method')
+
+
+
+class PostgreSQLSearchBackend(SearchBackend):
+    '''
+    Search with PostgreSQL full-text search.
+
+    If 'vector_field' is given, it should be a SearchVectorField on the
+    model, maintained by the app (e.g. a trigger) and GIN indexed. If
+    not, the vector is computed from 'fields'. Then, for speed, add the
+    expression index from get_index() to the model Meta.indexes.
+    Needs 'django.contrib.postgres'.
+    '''
+    config = 'english'
+
+    def __init__(self, fields, vector_field=None, config=None):
+        super().__init__(fields)
+        self.vector_field = vector_field
+        if (config is not None):
+            self.config = config
+
+    def get_vector(self):
+        from django.contrib.postgres.search import SearchVector
+        from django.db.models import F
+        if (self.vector_field):
+            return F(self.vector_field)
+        return SearchVector(*self.fields, config=self.config)
+
+    def get_index(self, name):
+        '''A GIN index on the computed vector, for Meta.indexes.'''
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+        return GinIndex(SearchVector(*self.fields, config=self.config), name=name)
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        search_query = SearchQuery(query, config=self.config)
+        vector = self.get_vector()
+        return (queryset
+            .annotate(search_vector=vector)
+            .filter(search_vector=search_query)
+            .annotate(search_rank=SearchRank(vector, search_query))
+            .order_by('-search_rank')
+            )
+
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    '''
+    Search with an SQLite FTS5 table.
+
+    The FTS5 table is an external-content table over the model table,
+    kept up to date by triggers. Create it in a migration, ::
+
+        migrations.RunSQL(backend.create_sql(Firework), backend.drop_sql(Firework))
+
+    Existing rows are indexed by the 'rebuild' command in create_sql().
+    '''
+    def __init__(self, fields, table_name=None):
+        super().__init__(fields)
+        self.table_name = table_name
+
+    def get_table_name(self, model):
+        return self.table_name or (model._meta.db_table + '_fts')
+
+    def _columns(self, model):
+        return [model._meta.get_field(f).column for f in self.fields]
+
+    def create_sql(self, model):
+        '''@return list of SQL statements creating the table and triggers'''
+        fts = self.get_table_name(model)
+        table = model._meta.db_table
+        pk = model._meta.pk.column
+        columns = self._columns(model)
+        cols = ', '.join(columns)
+        new_cols = ', '.join('new.' + c for c in columns)
+        old_cols = ', '.join('old.' + c for c in columns)
+        return [
+            "CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='{pk}')".format(
+                fts=fts, cols=cols, table=table, pk=pk),
+            "CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+            "INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_cols}); END".format(
+                fts=fts, table=table, pk=pk, cols=cols, new_cols=new_cols),
+            "CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+            "INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_cols}); END".format(
+                fts=fts, table=table, pk=pk, cols=cols, old_cols=old_cols),
+            "CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+            "INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{pk}, {old_cols}); "
+            "INSERT INTO {fts}(rowid, {cols}) VALUES (new.{pk}, {new_cols}); END".format(
+                fts=fts, table=table, pk=pk, cols=cols, old_cols=old_cols, new_cols=new_cols),
+            "INSERT INTO {fts}({fts}) VALUES ('rebuild')".format(fts=fts),
+        ]
+
+    def drop_sql(self, model):
+        fts = self.get_table_name(model)
+        return [
+            'DROP TRIGGER IF EXISTS {0}_ai'.format(fts),
+            'DROP TRIGGER IF EXISTS {0}_ad'.format(fts),
+            'DROP TRIGGER IF EXISTS {0}_au'.format(fts),
+            'DROP TABLE IF EXISTS {0}'.format(fts),
+        ]
+
+    def match_expression(self, query):
+        # Quote each term, so user input is not FTS5 query syntax
+        terms = query.split()
+        return ' '.join('"{0}"'.format(t.replace('"', '""')) for t in terms)
+
+    def search(self, queryset, query):
+        model = queryset.model
+        fts = self.get_table_name(model)
+        match = self.match_expression(query)
+        if (not match):
+            return queryset.none()
+        pk = '"{0}"."{1}"'.format(model._meta.db_table, model._meta.pk.column)
+        # bm25() is lower for better matches
+        return (queryset
+            .filter(pk__in=RawSQL(
+                'SELECT rowid FROM {0} WHERE {0} MATCH %s'.format(fts), [match]
+                ))
+            .annotate(search_rank=RawSQL(
+                'SELECT bm25({0}) FROM {0} WHERE {0} MATCH %s AND rowid = {1}'.format(fts, pk),
+                [match]
+                ))
+            .order_by('search_rank')
+            )
+
+
+
+search_backends = {
+    'postgresql': PostgreSQLSearchBackend,
+    'sqlite': SQLiteFTS5SearchBackend,
+}
+
+def default_search_backend(model, fields):
+    '''A backend for the database the model uses.'''
+    vendor = connections[model._default_manager.db].vendor
+    backend_class = search_backends.get(vendor)
+    if (backend_class is None):
+        raise ImproperlyConfigured(
+            "No full-text search backend for the database '{0}'".format(vendor)
+            )
+    return backend_class(fields)
+
+
+
+class SearchResultCache():
+    '''
+    Search results, as lists of pks, in a per-process LRU.
+
+    Entries expire after 'timeout' seconds, and the least recently used
+    are dropped past 'max_entries'. Each entry carries the version
+    stamp of the model. The stamp, kept in the Django cache so all
+    processes see it, changes on every save or delete of the model, so
+    stale entries are not used.
+    '''
+    cache_alias = 'default'
+    key_prefix = 'quickviews.search'
+
+    def __init__(self, timeout=300, max_entries=256, cache_alias=None):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        if (cache_alias is not None):
+            self.cache_alias = cache_alias
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.connected = set()
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _version_key(self, model):
+        return '{0}.version.{1}'.format(self.key_prefix, model._meta.label_lower)
+
+    def get_version(self, model):
+        # views connect when defined. This is for other callers
+        self.connect(model)
+        key = self._version_key(model)
+        version = self.cache.get(key)
+        if (version is None):
+            version = time.time()
+            if (not self.cache.add(key, version, None)):
+                # another process set it first
+                version = self.cache.get(key, version)
+        return version
+
+    def bump_version(self, sender, **kwargs):
+        self.cache.set(self._version_key(sender), time.time(), None)
+
+    def connect(self, model):
+        if (model in self.connected):
+            return
+        uid = self._version_key(model)
+        post_save.connect(self.bump_version, sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(self.bump_version, sender=model, weak=False, dispatch_uid=uid)
+        self.connected.add(model)
+
+    def get(self, model, key):
+        '''@return list of pks, or None'''
+        version = self.get_version(model)
+        with self.lock:
+            entry = self.entries.get((model, key))
+            if (entry is None):
+                return None
+            expires, entry_version, pks = entry
+            if (expires < time.monotonic() or entry_version != version):
+                del self.entries[(model, key)]
+                return None
+            self.entries.move_to_end((model, key))
+            return pks
+
+    def set(self, model, key, pks):
+        version = self.get_version(model)
+        with self.lock:
+            self.entries[(model, key)] = (time.monotonic() + self.timeout, version, pks)
+            self.entries.move_to_end((model, key))
+            while (len(self.entries) > self.max_entries):
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+
+# timeout, max_entries -> SearchResultCache
+_result_caches = {}
+
+def search_result_cache(timeout=300, max_entries=256):
+    '''The shared result cache for these bounds.'''
+    key = (timeout, max_entries)
+    if (key not in _result_caches):
+        _result_caches[key] = SearchResultCache(timeout, max_entries)
+    return _result_caches[key]
+
+
+
+def normalise_search_data(data):
+    '''
+    A stable key for cleaned form data. Text is stripped, lowercased
+    and has whitespace collapsed, so trivial variations of a query
+    share an entry.
+    '''
+    items = []
+    for name, value in sorted(data.items()):
+        if (isinstance(value, str)):
+            value = ' '.join(value.lower().split())
+        items.append('{0}={1!r}'.format(name, value))
+    return '&'.join(items)
+
+
+
+class CachedResults():
+    '''
+    Search results from a list of pks, in rank order. Slicing fetches
+    only the objects in the slice, so pagination makes one query for
+    the page.
+    '''
+    ordered = True
+
+    def __init__(self, queryset, pks):
+        self.queryset = queryset
+        self.pks = pks
+
+    def count(self):
+        return len(self.pks)
+
+    def __len__(self):
+        return len(self.pks)
+
+    def __getitem__(self, k):
+        if (not isinstance(k, slice)):
+            return self[k:k + 1][0]
+        pks = self.pks[k]
+        if (not pks):
+            return self.queryset.none()
+        order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(pks)])
+        return self.queryset.filter(pk__in=pks).order_by(order)
+
+    def __iter__(self):
+        step = 500
+        for i in range(0, len(self.pks), step):
+            yield from self[i:i + step]
+
+
+
+class SearchForm(forms.Form):
+    q = forms.CharField(label='Search', required=False)
+
+
+
+class SearchView(GetView):
+    '''
+    A GetView which searches a model, and renders ranked, paginated
+    results with a ModelListBuilder.
+
+    'search_fields' are searched. 'use_fields' are rendered, or set
+    'results_builder_class' to a ModelListBuilder subclass. The
+    backend is chosen for the model's database, or set
+    'search_backend' to a SearchBackend instance.
+    '''
+    model = None
+    search_fields = None
+    search_backend = None
+    form_class = SearchForm
+    query_arg = 'q'
+    use_fields = None
+    results_builder_class = None
+    rows_per_page = 25
+    display_title = 'Search {0}'
+    # Result pks cached per process. None for no cache.
+    search_cache_timeout = 300
+    search_cache_size = 256
+    search_cache_max_results = 1000
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Connect the version signals when the view is defined, so a
+        # process which saves, but has not searched, changes the stamp
+        if (cls.model is not None and cls.search_cache_timeout is not None):
+            search_result_cache(cls.search_cache_timeout, cls.search_cache_size).connect(cls.model)
+
+    def get_search_backend(self):
+        if (self.search_backend is not None):
+            return self.search_backend
+        if (not (self.model and self.search_fields)):
+            raise ImproperlyConfigured(
+                "{cls} needs 'model' and 'search_fields' attributes".format(
+                    cls = self.__class__.__name__
+                ))
+        return default_search_backend(self.model, self.search_fields)
+
+    def get_search_data(self):
+        '''
+        @return the cleaned data of the submitted form, or None
+        if the form is not valid
+        '''
+        form = self.get_form_class()(data=self.request.GET, prefix=self.get_prefix())
+        if (not form.is_valid()):
+            return None
+        return form.cleaned_data
+
+    def get_query(self, data):
+        return (data.get(self.query_arg) or '').strip()
+
+    def get_search_queryset(self, data):
+        '''The queryset searched. Override to filter on other form fields.'''
+        return self.model._default_manager.all()
+
+    def get_results(self, data):
+        query = self.get_query(data)
+        queryset = self.get_search_queryset(data)
+        if (self.search_cache_timeout is None):
+            return self.get_search_backend().search(queryset, query)
+        cache = search_result_cache(self.search_cache_timeout, self.search_cache_size)
+        # views on one model may search different fields
+        key = '{0}.{1}?{2}'.format(
+            self.__class__.__module__,
+            self.__class__.__qualname__,
+            normalise_search_data(data)
+            )
+        pks = cache.get(self.model, key)
+        if (pks is None):
+            pks = list(self.get_search_backend().search(queryset, query)
+                .values_list('pk', flat=True)[:self.search_cache_max_results]
+                )
+            cache.set(self.model, key, pks)
+        return CachedResults(queryset, pks)
+
+    def get_results_builder(self, results):
+        if (self.results_builder_class):
+            builder = self.results_builder_class(
+                list=results,
+                allow_empty=True,
+                rows_per_page=self.rows_per_page
+                )
+        else:
+            builder = ModelListBuilder(
+                model=self.model,
+                list=results,
+                use_fields=self.use_fields,
+                allow_empty=True,
+                rows_per_page=self.rows_per_page
+                )
+        q = self.request.GET.copy()
+        q.pop('page', None)
+        # 'page' implemented as a query parameter
+        builder.paginator_url = self.request.path + '?' + q.urlencode() + '&page={}'
+        return builder
+
+    def before_render_action(self, context):
+        data = self.get_search_data()
+        if (not data or not self.get_query(data)):
+            return
+        builder = self.get_results_builder(self.get_results(data))
+        page_number = self.request.GET.get('page', '1')
+        b = [builder.as_finished_table(page_number)]
+        pagination_nav = builder.get_pagination_as_html(page_number)
+        if (pagination_nav):
+            b.append('<ul class="pagenav">{0}</ul>'.format(pagination_nav))
+        context['data_display'] = mark_safe(''.join(b))
+        context['media'] = context['media'] + builder.media
+
+    def get_context_data(self, **kwargs):
+        if (self.model is not None):
+            kwargs['title'] = self.display_title.format(self.model._meta.verbose_name_plural)
+        context = super().get_context_data(**kwargs)
+        if (self.add_default_context):
+            context['actions'] = [submit_action("Search", attrs={'class':'"button primary"'})]
+        return context
+
+    class Media:
+        css = {
+            'all': ('quickviews/css/table.css',)
+            }
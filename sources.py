@@ -0,0 +1,185 @@
+import hashlib
+
+from collections import namedtuple
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+
+
+
+class ColumnarData():
+    '''
+    Rows held as columns, for list builders.
+
+    'columns' is a dict of name -> list, or NumPy array, all the same
+    length. Cells read the column named by their 'data_field'. Slicing
+    slices each column (for arrays, a view), so a page costs no row
+    objects. List builders render a page column by column, see
+    CellRenderer.render_column().
+
+    Iteration yields a dict for each row. That is slow, and only for
+    code which needs rows, such as aggregates.
+    '''
+    def __init__(self, columns):
+        self.columns = columns
+        lengths = {len(c) for c in columns.values()}
+        if (len(lengths) > 1):
+            raise ValueError('ColumnarData columns must be the same length')
+        self.length = lengths.pop() if (lengths) else 0
+
+    def __len__(self):
+        return self.length
+
+    def count(self):
+        return self.length
+
+    def row(self, i):
+        return {name: c[i] for name, c in self.columns.items()}
+
+    def __getitem__(self, k):
+        if (isinstance(k, slice)):
+            return ColumnarData({name: c[k] for name, c in self.columns.items()})
+        return self.row(k)
+
+    def __iter__(self):
+        for i in range(self.length):
+            yield self.row(i)
+
+    def __repr__(self):
+        return '<{0} columns=({1}) length={2}>'.format(
+            self.__class__.__name__,
+            ';'.join(self.columns),
+            self.length
+            )
+
+
+
+class RowList(list):
+    """Rows of a query, with the names of their columns."""
+    def __init__(self, rows, column_names):
+        super().__init__(rows)
+        self.column_names = column_names
+
+
+
+class SQLRows():
+    '''
+    Rows from raw SQL, for list builders.
+
+    Pages are read with LIMIT/OFFSET appended to the SQL, so the SQL
+    should have an ORDER BY, and no LIMIT. The row count is a COUNT(*)
+    over the SQL as a subquery, kept in the cache for 'count_timeout'
+    seconds. Iterating, for an unpaginated list, streams rows through a
+    server-side cursor on PostgreSQL (a chunked cursor elsewhere).
+
+    Rows are tuples, or, if 'row_class' is 'namedtuple', namedtuples.
+    List builders set the cells to read rows by position.
+    '''
+    cache_alias = 'default'
+    count_timeout = 60
+    chunk_size = 2000
+    row_class = 'tuple'
+
+    def __init__(self, sql, params=None, using='default', row_class=None,
+        count_timeout=None, keyset_column=None):
+        self.sql = sql.strip().rstrip(';')
+        self.params = list(params or [])
+        self.using = using
+        if (row_class is not None):
+            self.row_class = row_class
+        if (count_timeout is not None):
+            self.count_timeout = count_timeout
+        self.keyset_column = keyset_column
+        self._count = None
+        self._row_types = {}
+        # known after a query
+        self.column_names = None
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def get_count_key(self):
+        state = '{0}|{1!r}|{2}'.format(self.sql, self.params, self.using)
+        return 'quickviews.sqlcount.' + hashlib.sha1(state.encode('utf-8')).hexdigest()
+
+    def count(self):
+        if (self._count is None):
+            cache = caches[self.cache_alias]
+            key = self.get_count_key()
+            n = cache.get(key)
+            if (n is None):
+                with self.connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT COUNT(*) FROM ({0}) quickviews_count'.format(self.sql),
+                        self.params
+                        )
+                    n = cursor.fetchone()[0]
+                cache.set(key, n, self.count_timeout)
+            self._count = n
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def _make_rows(self, cursor, rows):
+        names = tuple(c[0] for c in cursor.description)
+        self.column_names = names
+        if (self.row_class == 'namedtuple'):
+            row_type = self._row_types.get(names)
+            if (row_type is None):
+                row_type = self._row_types[names] = namedtuple('Row', names, rename=True)
+            rows = [row_type._make(r) for r in rows]
+        return RowList(rows, names)
+
+    def query(self, sql, params):
+        '''@return a RowList'''
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return self._make_rows(cursor, cursor.fetchall())
+
+    def __getitem__(self, k):
+        if (not isinstance(k, slice)):
+            return self[k:k + 1][0]
+        if (k.step is not None):
+            raise ValueError('SQLRows slices have no step')
+        start = k.start or 0
+        if (k.stop is None):
+            limit = self.connection.ops.no_limit_value()
+            if (limit is None):
+                return self.query(self.sql + ' OFFSET %s', self.params + [start])
+        else:
+            limit = max(k.stop - start, 0)
+        return self.query(self.sql + ' LIMIT %s OFFSET %s', self.params + [limit, start])
+
+    def keyset_page(self, after, limit):
+        '''
+        Rows following the key 'after' (None for the first), ordered on
+        'keyset_column'. The database seeks to the key, so deep pages
+        are as quick as the first (given an index). 
+        @return a RowList
+        '''
+        if (self.keyset_column is None):
+            raise ImproperlyConfigured(
+                "SQLRows.keyset_page() needs 'keyset_column', the name of a unique, ordered column of the SQL."
+                )
+        sql = 'SELECT * FROM ({0}) quickviews_keyset'.format(self.sql)
+        params = list(self.params)
+        if (after is not None):
+            sql += ' WHERE {0} > %s'.format(self.connection.ops.quote_name(self.keyset_column))
+            params.append(after)
+        sql += ' ORDER BY {0} LIMIT %s'.format(self.connection.ops.quote_name(self.keyset_column))
+        params.append(limit)
+        return self.query(sql, params)
+
+    def __iter__(self):
+        with self.connection.chunked_cursor() as cursor:
+            cursor.execute(self.sql, self.params)
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if (not rows):
+                    break
+                yield from self._make_rows(cursor, rows)
+
+    def __repr__(self):
+        return '<{0} {1!r}>'.format(self.__class__.__name__, self.sql[:40])
@@ -0,0 +1,80 @@
+from django import template
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.utils.html import mark_safe
+
+
+register = template.Library()
+
+
+
+def _fragment_key(name, builder, vary_on):
+    cls = builder if isinstance(builder, type) else builder.__class__
+    return make_template_fragment_key(
+        '{0}.{1}.{2}'.format(name, cls.__module__, cls.__qualname__),
+        vary_on
+        )
+
+
+def _get_builder(builder):
+    # a class is built only when the fragment is rendered
+    if (isinstance(builder, type)):
+        return builder()
+    return builder
+
+
+def _cached_fragment(key, timeout, cache_alias, render):
+    if (timeout is None):
+        return render()
+    cache = caches[cache_alias]
+    html = cache.get(key)
+    if (html is None):
+        html = render()
+        cache.set(key, html, timeout)
+    return mark_safe(html)
+
+
+
+@register.simple_tag
+def quickview_list(builder, *vary_on, page=1, timeout=None, cache='default', nav=True):
+    '''
+    Render a list builder as a table, with page navigation.
+        {% quickview_list builder request.user.pk page=2 timeout=300 %}
+
+    'builder' is a ListBuilder, or a ListBuilder class. If 'timeout' is
+    set the fragment is cached, keyed by the builder class, page and
+    any positional values. On a cache hit the builder is not rendered,
+    so no queries run. A builder class is not even built.
+    '''
+    def render():
+        b = _get_builder(builder)
+        html = b.as_finished_table(page)
+        if (nav):
+            pagination_nav = b.get_pagination_as_html(page)
+            if (pagination_nav):
+                html += '<ul class="pagenav">{0}</ul>'.format(pagination_nav)
+        return mark_safe(html)
+    paginator_url = None if isinstance(builder, type) else builder.paginator_url
+    key = _fragment_key('quickview_list', builder, (page, paginator_url) + vary_on)
+    return _cached_fragment(key, timeout, cache, render)
+
+
+@register.simple_tag
+def quickview_detail(builder, *vary_on, style='list', timeout=None, cache='default'):
+    '''
+    Render a detail builder.
+        {% quickview_detail builder object.pk timeout=300 %}
+
+    'style' is 'list', 'table' or 'span'. 'builder' is a DetailBuilder,
+    or a DetailBuilder class. If 'timeout' is set the fragment is cached,
+    keyed by the builder class, style and positional values. Include
+    something identifying the object, e.g. the pk, in the values.
+    '''
+    if (style not in ('list', 'table', 'span')):
+        raise template.TemplateSyntaxError(
+            "quickview_detail 'style' must be one of 'list', 'table' or 'span'"
+            )
+    def render():
+        return getattr(_get_builder(builder), 'as_' + style)()
+    key = _fragment_key('quickview_detail', builder, (style,) + vary_on)
+    return _cached_fragment(key, timeout, cache, render)
@@ -0,0 +1,154 @@
+import threading
+import time
+
+from collections import OrderedDict
+from contextlib import contextmanager, ExitStack
+from django.conf import settings
+from django.db import connections
+
+
+
+class QueryTimer():
+    '''
+    Database execute wrapper which counts queries and sums their time.
+    Install with connection.execute_wrapper().
+    '''
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+
+class ServerTiming():
+    '''
+    Collect named durations and render them as a HTTP 'Server-Timing'
+    header value.
+
+    Durations are stored in seconds, rendered in milliseconds. Repeated
+    entries for a name are summed e.g. rows rendered by several calls.
+    Phases are exclusive. Time in a phase nested in another is counted
+    for the nested phase only, so the phases sum to no more than the
+    total.
+    '''
+    def __init__(self):
+        # name -> [duration, description]
+        self.entries = OrderedDict()
+        # time in phases nested in each running phase
+        self._nested = []
+        self._thread = threading.get_ident()
+
+    def add(self, name, duration=None, desc=None):
+        entry = self.entries.setdefault(name, [None, None])
+        if (duration is not None):
+            entry[0] = (entry[0] or 0.0) + duration
+        if (desc is not None):
+            entry[1] = desc
+
+    @contextmanager
+    def phase(self, name, desc=None):
+        # Work on other threads, e.g. a prefetch sharing the view, is
+        # not part of the response
+        if (threading.get_ident() != self._thread):
+            yield
+            return
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested.pop()
+            if (self._nested):
+                self._nested[-1] += elapsed
+            self.add(name, elapsed - nested, desc)
+
+    def as_header(self):
+        b = []
+        for name, (duration, desc) in self.entries.items():
+            metric = name
+            if (duration is not None):
+                metric += ';dur={0:.1f}'.format(duration * 1000)
+            if (desc is not None):
+                metric += ';desc="{0}"'.format(str(desc).replace('"', "'"))
+            b.append(metric)
+        return ', '.join(b)
+
+    def __str__(self):
+        return self.as_header()
+
+
+
+class ServerTimingMixin():
+    '''
+    Add a 'Server-Timing' header to view responses.
+
+    The header breaks out query time ('db'), query count ('db-count'),
+    row render time ('rows'), pagination render time ('pagination'),
+    template render time ('template') and a 'total'. Context values
+    render lazily, so rows and pagination often run inside the
+    template, and their time is taken from 'template'. Phases which
+    did not run are not reported.
+
+    Off by default, as timings are exposed to anyone who can see the
+    response. Enable for all QuickViews with the setting, ::
+
+        QUICKVIEWS_SERVER_TIMING = True
+
+    or on a view with the attribute 'server_timing'.
+
+    Note that, when enabled, the template response is rendered inside
+    the view, so 'process_template_response' middleware can not alter
+    the context.
+    '''
+    server_timing = None
+    timing = None
+
+    def get_server_timing(self):
+        if (self.server_timing is None):
+            return getattr(settings, 'QUICKVIEWS_SERVER_TIMING', False)
+        return self.server_timing
+
+    @contextmanager
+    def timed(self, name):
+        '''Time a phase of work, if this request is timed.'''
+        if (self.timing is None):
+            yield
+        else:
+            with self.timing.phase(name):
+                yield
+
+    def dispatch(self, request, *args, **kwargs):
+        if (not self.get_server_timing()):
+            return super().dispatch(request, *args, **kwargs)
+        self.timing = ServerTiming()
+        query_timer = QueryTimer()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_timer))
+            response = super().dispatch(request, *args, **kwargs)
+            if (callable(getattr(response, 'render', None))
+                and not getattr(response, 'is_rendered', True)):
+                with self.timed('template'):
+                    response.render()
+        self.timing.add('db', query_timer.duration)
+        self.timing.add('db-count', desc=query_timer.count)
+        self.timing.add('total', time.perf_counter() - start)
+        response['Server-Timing'] = self.timing.as_header()
+        return response
+
+    def _html_output(self, *args, **kwargs):
+        with self.timed('rows'):
+            return super()._html_output(*args, **kwargs)
+
+    def get_pagination_as_html(self, *args, **kwargs):
+        with self.timed('pagination'):
+            return super().get_pagination_as_html(*args, **kwargs)
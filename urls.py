@@ -0,0 +1,10 @@
+from django.urls import re_path
+
+from . import media
+
+
+app_name = 'quickviews'
+
+urlpatterns = [
+    re_path(r'^css/(?P<name>[0-9a-f]+)\.css$', media.css_bundle, name='css_bundle'),
+]
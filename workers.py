@@ -0,0 +1,43 @@
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+from django.db import connections
+
+
+
+def call_in_worker(func, *args):
+    '''
+    Call func(*args) on a worker thread. The thread has it's own
+    database connections, which are closed after, as pool threads
+    outlive the request.
+    '''
+    try:
+        return func(*args)
+    finally:
+        connections.close_all()
+
+
+
+class LazyExecutor():
+    '''
+    A ThreadPoolExecutor made on first use, so idle processes start no
+    threads. 'max_workers' can be a callable, e.g. reading a setting,
+    called when the pool is made.
+    '''
+    def __init__(self, name, max_workers):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if (self._executor is None):
+                max_workers = self.max_workers
+                if (callable(max_workers)):
+                    max_workers = max_workers()
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix='quickviews-' + self.name
+                    )
+        return self._executor